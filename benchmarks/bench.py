@@ -0,0 +1,203 @@
+import argparse
+import json
+import platform
+import sys
+import time
+from collections import defaultdict
+from functools import partial
+from random import Random
+from statistics import mean, quantiles
+
+from engine.state.gamestate import GameState
+from engine.state.playerstate import PlayerState
+from enums.enums import Factions, Zones
+from starstuff import play_game
+from strategies.explorer_strategy import ExplorerStrategy
+from strategies.faction_strategy import FactionStrategy
+from strategies.splurge_strategy import SplurgeStrategy
+from util.util import derive_seeds
+
+# Usage:
+#     python -m benchmarks.bench run -o before.json
+#     ...change something...
+#     python -m benchmarks.bench run -o after.json
+#     python -m benchmarks.bench compare before.json after.json
+#
+# A result file maps metric names to {"value": ..., "unit": ..., "better": "higher" | "lower"}; compare flags every
+# metric that moved the wrong way by more than the threshold, and exits non-zero if there were any.
+
+MATCHUPS = {
+    "FactionStrategy": (partial(FactionStrategy, Factions.STAR_EMPIRE),
+                        partial(FactionStrategy, Factions.MACHINE_CULT)),
+    "SplurgeStrategy": (SplurgeStrategy, SplurgeStrategy),
+    "ExplorerStrategy": (ExplorerStrategy, ExplorerStrategy),
+}
+
+
+def _metric(value, unit, better):
+    return {"value": value, "unit": unit, "better": better}
+
+
+def bench_games(games, seed=0):
+    # games/sec for play_game() with each bundled strategy playing itself
+    metrics = {}
+    for name, (factory_1, factory_2) in MATCHUPS.items():
+        seeds = derive_seeds(seed, games)
+        gamestate = GameState("Alice", "Bob")
+        start = time.perf_counter()
+        for game_seed in seeds:
+            play_game(game_seed, factory_1(), factory_2(), gamestate=gamestate)
+        metrics["games_per_sec.{}".format(name)] = _metric(games / (time.perf_counter() - start), "games/s", "higher")
+    return metrics
+
+
+def bench_moves(games, seed=0):
+    # Per-Move-class execute() latency, collected from whole games
+    timings = defaultdict(list)
+    clock = time.perf_counter_ns
+    for name, (factory_1, factory_2) in MATCHUPS.items():
+        for game_seed in derive_seeds(seed, games):
+            gamestate = GameState("Alice", "Bob", seed=game_seed)
+            strategies = {"Alice": factory_1(), "Bob": factory_2()}
+            while not gamestate.victor:
+                for move in strategies[gamestate.active_player.name].get_moves(gamestate):
+                    start = clock()
+                    move.execute(gamestate)
+                    timings[type(move).__name__].append(clock() - start)
+                    if gamestate.victor:
+                        break
+
+    metrics = {}
+    for move_name, samples in sorted(timings.items()):
+        metrics.update(_distribution("move_us.{}".format(move_name), samples))
+    return metrics
+
+
+def bench_micro(iterations, seed=0):
+    # Engine primitives. Every iteration gets a freshly prepared state, and only the call itself is timed.
+    rng = Random(seed)
+    return dict(_distribution("micro_us.PlayerState.draw", _time_calls(iterations, _prepare_draw, rng)),
+                **_distribution("micro_us.PlayerState.shuffle_deck", _time_calls(iterations, _prepare_shuffle, rng)),
+                **_distribution("micro_us.PlayerState.end_turn", _time_calls(iterations, _prepare_end_turn, rng)),
+                **_distribution("micro_us.GameState.fill_trade_row", _time_calls(iterations, _prepare_fill, rng)))
+
+
+def _prepare_draw(rng):
+    return partial(PlayerState(first_player=True, rng=Random(rng.random())).draw, 5)
+
+
+def _prepare_shuffle(rng):
+    player = PlayerState(rng=Random(rng.random()))
+    for zone in (Zones.DECK, Zones.HAND):
+        for card in list(player[zone]):
+            card.move_to(Zones.DISCARD)
+            player[zone].remove(card)
+            player[Zones.DISCARD].append(card)
+    return player.shuffle_deck
+
+
+def _prepare_end_turn(rng):
+    player = PlayerState(rng=Random(rng.random()))
+    for card in list(player[Zones.HAND]):
+        card.move_to(Zones.IN_PLAY)
+        player[Zones.HAND].remove(card)
+        player[Zones.IN_PLAY].append(card)
+    return player.end_turn
+
+
+def _prepare_fill(rng):
+    gamestate = GameState("Alice", "Bob", rng=Random(rng.random()))
+    gamestate.trade_row.clear()
+    return gamestate.fill_trade_row
+
+
+def _time_calls(iterations, prepare, rng):
+    calls = [prepare(rng) for _ in range(iterations)]
+    clock = time.perf_counter_ns
+    samples = []
+    for call in calls:
+        start = clock()
+        call()
+        samples.append(clock() - start)
+    return samples
+
+
+def _distribution(prefix, samples_ns):
+    samples = [s / 1000 for s in samples_ns]
+    if len(samples) > 1:
+        percentiles = quantiles(samples, n=100)
+        p50, p90, p99 = percentiles[49], percentiles[89], percentiles[98]
+    else:
+        p50 = p90 = p99 = samples[0]
+    return {"{}.mean".format(prefix): _metric(mean(samples), "us", "lower"),
+            "{}.p50".format(prefix): _metric(p50, "us", "lower"),
+            "{}.p90".format(prefix): _metric(p90, "us", "lower"),
+            "{}.p99".format(prefix): _metric(p99, "us", "lower")}
+
+
+def run(games=50, iterations=2000, seed=0):
+    metrics = {}
+    metrics.update(bench_games(games, seed))
+    metrics.update(bench_moves(max(1, games // 5), seed))
+    metrics.update(bench_micro(iterations, seed))
+    return {"meta": {"python": platform.python_version(),
+                     "platform": platform.platform(),
+                     "timestamp": time.time(),
+                     "games": games,
+                     "iterations": iterations,
+                     "seed": seed},
+            "metrics": metrics}
+
+
+def compare(old, new, threshold=0.1):
+    # Returns (name, old value, new value, relative change) for every metric that got worse by more than threshold
+    regressions = []
+    for name, new_metric in sorted(new["metrics"].items()):
+        old_metric = old["metrics"].get(name)
+        if old_metric is None or not old_metric["value"]:
+            continue
+        change = (new_metric["value"] - old_metric["value"]) / old_metric["value"]
+        worse = -change if new_metric["better"] == "higher" else change
+        if worse > threshold:
+            regressions.append((name, old_metric["value"], new_metric["value"], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmarks and save the results as JSON")
+    run_parser.add_argument("-o", "--output", default="bench_output.json")
+    run_parser.add_argument("--games", type=int, default=50, help="games per strategy for games/sec")
+    run_parser.add_argument("--iterations", type=int, default=2000, help="calls per microbenchmark")
+    run_parser.add_argument("--seed", type=int, default=0)
+
+    compare_parser = subparsers.add_parser("compare", help="flag regressions between two result files")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="relative change to flag (0.1 = 10%%)")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        results = run(args.games, args.iterations, args.seed)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        for name, metric in sorted(results["metrics"].items()):
+            print("{:<50} {:>12.2f} {}".format(name, metric["value"], metric["unit"]))
+        return 0
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    regressions = compare(old, new, args.threshold)
+    for name, old_value, new_value, change in regressions:
+        print("REGRESSION {:<50} {:>12.2f} -> {:>12.2f} ({:+.1%})".format(name, old_value, new_value, change))
+    if not regressions:
+        print("No regressions over {:.0%}".format(args.threshold))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,11 @@
-from engine.effects import ValueEffect, DrawEffect, OpponentDiscardEffect, PendChoice, PendScrap, PendRecycle, \
-    GainFactionEffect, PendBrainWorld, PendDestroyBase, GainTrade, GainAuthority, GainDamage, PendCopyShip, \
-    BlobWorldDrawEffect, PendAcquireShipToTopForFree, ShopToTopEffect, MachineBaseEffect, EmbassyYachtDrawEffect
-from enums.enums import Triggers, CardTypes, Factions, Zones
+from collections.abc import MutableMapping
+
+from engine.effects import PendEffect, ValueEffect, DrawEffect, OpponentDiscardEffect, PendChoice, PendScrap, \
+    PendRecycle, GainFactionEffect, PendBrainWorld, PendDestroyBase, GainTrade, GainAuthority, GainDamage, \
+    PendCopyShip, BlobWorldDrawEffect, PendAcquireShipToTopForFree, ShopToTopEffect, MachineBaseEffect, \
+    EmbassyYachtDrawEffect
+from enums.enums import Triggers, CardTypes, Factions, Passives, Zones
+from util.util import slot_items
 
 
 DRAW_ONE = DrawEffect(1)
@@ -11,31 +15,209 @@ DISCARD = OpponentDiscardEffect()
 DESTROY_BASE = PendDestroyBase()
 
 
-class Card(object):
+# A card tracks which of its abilities are still available as a bitmask of these, so readying or exhausting it is
+# one assignment; the effects themselves are only ever read from the class
+TRIGGER_BITS = {trigger: 1 << i for i, trigger in enumerate(Triggers)}
+
+# What a card holds while it isn't in play. Cards only get their own set while in play, so the ~100 cards of a game
+# cost nothing beyond their slots until they're played.
+NO_FACTIONS = frozenset()
+
+
+def _effect_order(effect):
+    # Pending effects last, everything else by type and settings. Anything but hash order: effects hash by id, so
+    # iterating an ability's set would apply its effects in a different order from one process to the next.
+    settings = sorted((k, repr(v)) for k, v in slot_items(effect) if k != "gamestate")
+    return isinstance(effect, PendEffect), type(effect).__name__, repr(settings)
+
+
+def _compile(effects):
+    # One trigger's effects as the program trigger_ability hands out: (value_type, amount) shorthands become
+    # ValueEffects, gains of the same value are summed into one, and everything is put in _effect_order, which runs
+    # the immediate effects before any pending ones
+    gains = {}
+    program = []
+    for effect in effects:
+        if isinstance(effect, tuple):
+            effect = ValueEffect(*effect)
+        if isinstance(effect, ValueEffect):
+            gains.setdefault(effect.value_type, []).append(effect)
+        else:
+            program.append(effect)
+    for value_type, same in gains.items():
+        if len(same) > 1:
+            total = sum(gain.amount for gain in same)
+            gain_class = type(same[0])
+            if gain_class is not ValueEffect and all(type(gain) is gain_class for gain in same):
+                same = [gain_class(total)]  # GainTrade(1) and GainTrade(2) make GainTrade(3)
+            else:
+                same = [ValueEffect(value_type, total)]
+        program.extend(same)
+    return tuple(sorted(program, key=_effect_order))
+
+
+class AvailableAbilities(MutableMapping):
+    # card.available_abilities: the triggers still available and their effects, backed by card.available. Deleting a
+    # trigger exhausts it; setting one readies it, but only with the effects the card (or what it copied) has for it.
+    __slots__ = ("card",)
+
+    def __init__(self, card):
+        self.card = card
+
+    def __getitem__(self, trigger):
+        if not self.card.available & TRIGGER_BITS[trigger]:
+            raise KeyError(trigger)
+        return self.card._program(trigger)
+
+    def __setitem__(self, trigger, effects):
+        card = self.card
+        try:
+            program = card._program(trigger)
+        except (KeyError, TypeError):
+            program = None
+        if effects is not program and effects != program:
+            raise ValueError("{} has no such {} ability; see copy_abilities".format(card.name, trigger.name))
+        card.touch()
+        card.available |= TRIGGER_BITS[trigger]
+
+    def __delitem__(self, trigger):
+        card = self.card
+        if not card.available & TRIGGER_BITS[trigger]:
+            raise KeyError(trigger)
+        card.touch()
+        card.available &= ~TRIGGER_BITS[trigger]
+
+    def __iter__(self):
+        available = self.card.available
+        return iter([trigger for trigger, bit in TRIGGER_BITS.items() if available & bit])
+
+    def __len__(self):
+        available = self.card.available
+        return sum(1 for bit in TRIGGER_BITS.values() if available & bit)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class CardType(type):
+    # Card classes are the shared, immutable prototypes (name, cost, abilities...). Giving every one of them empty
+    # __slots__ keeps instances down to the per-game state declared on Card, and abilities (and passives) are compiled
+    # once, here, into a fixed program per trigger.
+    def __new__(mcs, name, bases, namespace):
+        namespace.setdefault("__slots__", ())
+        for attribute in ("abilities", "passives"):
+            if namespace.get(attribute):
+                namespace[attribute] = {trigger: _compile(effects)
+                                        for trigger, effects in namespace[attribute].items()}
+        if namespace.get("abilities") is not None:
+            # The capability tables behind has_ability() and gain()
+            abilities = namespace["abilities"]
+            namespace["_ability_types"] = frozenset((trigger, type(effect))
+                                                    for trigger, effects in abilities.items() for effect in effects)
+            namespace["_gains"] = {trigger: {effect.value_type: effect.amount
+                                             for effect in effects if isinstance(effect, ValueEffect)}
+                                   for trigger, effects in abilities.items()}
+            namespace["_trigger_mask"] = sum(TRIGGER_BITS[trigger] for trigger in abilities)
+        return super().__new__(mcs, name, bases, namespace)
+
+
+class Card(object, metaclass=CardType):
+    __slots__ = ("card_id", "owner_id", "location", "available", "copied", "active_factions", "journal")
+
     name = None
     card_type = None
     faction = None
     cost = None
     defense = None
     abilities = None
-
-    def __init__(self, owner_id=None, location=None):
-        self.available_abilities = {}
-        self.active_factions = set()
-
+    passives = {}  # Passives -> effects applied whenever that happens while this card is in play; see PlayerState
+    type_id = None  # Position in components.decks.card_types
+    _ability_types = frozenset()  # (trigger, effect class) pairs
+    _gains = {}  # trigger -> value type -> amount
+    _trigger_mask = 0  # TRIGGER_BITS of every trigger in abilities
+
+    def __init__(self, owner_id=None, location=None, card_id=None):
+        self.available = 0  # TRIGGER_BITS of the abilities that can still be triggered
+        self.copied = None  # The card class whose abilities this one has taken on (Stealth Needle), see copy_abilities
+        self.active_factions = NO_FACTIONS
+        self.journal = None  # Set by the zones of a journaling GameState, see Zone
+
+        self.card_id = card_id
         self.owner_id = owner_id
         self.location = location
 
+    def touch(self):
+        # Call before changing this card's state from outside, so a journal can record it first
+        if self.journal is not None:
+            self.journal.record(self)
+
     def ready(self):
-        if self.faction:
-            self.active_factions.add(self.faction)
-        self.available_abilities.update(self.abilities)
+        if self.journal is not None:
+            self.journal.record(self)
+        self.active_factions = {self.faction} if self.faction else set()
+        self.available = self._trigger_mask
+        self.copied = None
 
     def exhaust(self):
-        self.active_factions.clear()
-        self.available_abilities.clear()
+        if self.journal is not None:
+            self.journal.record(self)
+        self.active_factions = NO_FACTIONS
+        self.available = 0
+        self.copied = None
+
+    def copy_abilities(self, card):
+        # Makes card's abilities available on this one as well, replacing any of its own for the same triggers
+        if self.journal is not None:
+            self.journal.record(self)
+        self.copied = type(card)
+        self.available |= card._trigger_mask
+
+    def can_trigger(self, trigger):
+        return bool(self.available & TRIGGER_BITS[trigger])
+
+    @property
+    def available_abilities(self):
+        # A live view: del card.available_abilities[Triggers.ALLY] exhausts the ally ability
+        return AvailableAbilities(self)
+
+    def copy(self):
+        # The same card with independent state, for GameState.clone()
+        card = object.__new__(type(self))
+        card.card_id = self.card_id
+        card.owner_id = self.owner_id
+        card.location = self.location
+        card.journal = None
+        card.available = self.available
+        card.copied = self.copied
+        card.active_factions = NO_FACTIONS if self.active_factions is NO_FACTIONS else set(self.active_factions)
+        return card
+
+    def snapshot(self):
+        active_factions = self.active_factions
+        return (self.owner_id,
+                self.location,
+                self.available,
+                self.copied,
+                NO_FACTIONS if active_factions is NO_FACTIONS else frozenset(active_factions))
+
+    def restore(self, snapshot):
+        # In-play state is copied on the way back in, so one snapshot can be restored any number of times
+        self.owner_id, self.location, self.available, self.copied, active_factions = snapshot
+        self.active_factions = NO_FACTIONS if active_factions is NO_FACTIONS else set(active_factions)
+
+    def __getstate__(self):
+        # The placeholder can't be pickled, so out-of-play state goes as None
+        return (self.card_id, self.owner_id, self.location, self.available, self.copied,
+                None if self.active_factions is NO_FACTIONS else self.active_factions)
+
+    def __setstate__(self, state):
+        self.card_id, self.owner_id, self.location, self.available, self.copied, active_factions = state
+        self.active_factions = NO_FACTIONS if active_factions is None else active_factions
+        self.journal = None
 
     def move_to(self, new_zone, new_owner_id=None):
+        if self.journal is not None:
+            self.journal.record(self)
         if new_zone == Zones.IN_PLAY:
             self.ready()
         elif self.location == Zones.IN_PLAY:
@@ -48,20 +230,32 @@ class Card(object):
         if new_owner_id:
             self.owner_id = new_owner_id
 
-    def has_ability(self, effect_class, triggers=None):
-        return any([type(ability) == effect_class
-                    for trigger, abilities in self.abilities.items()
-                    for ability in abilities if triggers is None or trigger in triggers])
+    @classmethod
+    def has_ability(cls, effect_class, triggers=None):
+        # Whether any of the triggers (default: any trigger) has an effect of exactly effect_class
+        if triggers is None:
+            triggers = cls.abilities
+        return any((trigger, effect_class) in cls._ability_types for trigger in triggers)
+
+    @classmethod
+    def gain(cls, trigger, value_type):
+        # How much of value_type (trade, damage, authority) the trigger gives outright, e.g. a card's scrap damage
+        return cls._gains.get(trigger, {}).get(value_type, 0)
 
     def trigger_ability(self, trigger):
-        effects_data = self.available_abilities.pop(trigger)
-        effects = []
-        for effect in effects_data:
-            if isinstance(effect, tuple):
-                effects.append(ValueEffect(effect[0], effect[1]))
-            else:
-                effects.append(effect)
-        return effects
+        bit = TRIGGER_BITS[trigger]
+        if not self.available & bit:
+            raise KeyError(trigger)
+        if self.journal is not None:
+            self.journal.record(self)
+        self.available &= ~bit
+        return self._program(trigger)
+
+    def _program(self, trigger):
+        # The class's compiled program itself: nothing is built per trigger
+        if self.copied is not None and trigger in self.copied.abilities:
+            return self.copied.abilities[trigger]
+        return self.abilities[trigger]
 
     def is_base(self):
         return self.card_type != CardTypes.SHIP
@@ -842,7 +1036,9 @@ class FleetHQ(Card):
     name = "FleetHQ"
     cost = 8
     defense = 8
-    abilities = {
-            # TODO...? This is currently hardcoded into PlayCard,
-            # which honestly feels Just Fine unless there are other passive effects
+    abilities = {}
+    passives = {
+        Passives.SHIP_PLAYED: {
+            GainDamage(1)
+        }
     }
@@ -50,7 +50,15 @@ standard_deck = {
     FleetHQ: 1
 }
 
+# Every card class in the game. Positions double as integer card codes (engine.gamelog, engine.batch), so only append.
+card_types = [Scout, Viper, Explorer] + list(standard_deck)
+for _type_id, _card_type in enumerate(card_types):
+    _card_type.type_id = _type_id
 
-def get_fresh_trade_deck():
-    return [c(location=Zones.TRADE_DECK)
-            for _c in [[card] * number for card, number in standard_deck.items()] for c in _c]
+
+_trade_deck_cards = [card for card, number in standard_deck.items() for _ in range(number)]
+
+
+def get_fresh_trade_deck(first_card_id=0):
+    return [card(location=Zones.TRADE_DECK, card_id=card_id)
+            for card_id, card in enumerate(_trade_deck_cards, first_card_id)]
@@ -0,0 +1,280 @@
+from collections import Counter
+
+import numpy as np
+
+from components.cards import Scout, Viper, Explorer
+from components.decks import card_types, standard_deck
+from engine.effects import ValueEffect, DrawEffect, OpponentDiscardEffect, PendChoice
+from enums.enums import CardTypes, Factions, Triggers, ValueTypes
+
+# An alternate engine that plays N games at once as NumPy arrays, for policies simple enough to vectorize.
+#
+# Zones are card-count vectors indexed [game, player, card code] (codes are positions in components.decks.card_types),
+# so a shuffled deck is just counts, and drawing picks a card at random weighted by those counts. Authority, forced
+# discards and the trade row are arrays too; every turn steps all unfinished games together.
+#
+# Card behaviour is read from the card classes' abilities, but only the parts that vectorize:
+#   - trade, damage, authority, draws and opponent discards are modelled exactly
+#   - a PendChoice counts as the average of its options
+#   - scrap abilities and every other pending effect (scrapping, destroying bases, copying, free acquires) are ignored
+#   - cards acquired to the top of the deck, Fleet HQ and Embassy Yacht/Blob World draws are ignored
+# so it agrees with the object engine on aggregate statistics rather than game by game.
+
+TRADE, DAMAGE, AUTHORITY, DRAW, DISCARD = range(5)
+_VALUE_COLUMNS = {ValueTypes.TRADE: TRADE, ValueTypes.DAMAGE: DAMAGE, ValueTypes.AUTHORITY: AUTHORITY}
+
+FACTIONS = list(Factions)
+CARD_COUNT = len(card_types)
+
+
+def _effect_values(effects):
+    values = np.zeros(5)
+    for effect in effects:
+        if isinstance(effect, ValueEffect):
+            values[_VALUE_COLUMNS[effect.value_type]] += effect.amount
+        elif isinstance(effect, DrawEffect):
+            values[DRAW] += effect.amount
+        elif isinstance(effect, OpponentDiscardEffect):
+            values[DISCARD] += 1
+        elif isinstance(effect, PendChoice):
+            values += np.mean([_effect_values([choice]) for choice in effect.choices.values()], axis=0)
+    return values
+
+
+def _ability_table(trigger_for):
+    return np.array([_effect_values(card.abilities.get(trigger_for(card), ())) for card in card_types])
+
+
+PRIMARY = _ability_table(lambda card: Triggers.SHIP if card.card_type == CardTypes.SHIP else Triggers.BASE)
+ALLY = _ability_table(lambda card: Triggers.ALLY)
+COST = np.array([card.cost for card in card_types], dtype=float)
+DEFENSE = np.array([card.defense or 0 for card in card_types], dtype=float)
+IS_BASE = np.array([card.card_type != CardTypes.SHIP for card in card_types])
+IS_OUTPOST = np.array([card.card_type == CardTypes.OUTPOST for card in card_types])
+FACTION_INDEX = np.array([FACTIONS.index(card.faction) if card.faction else -1 for card in card_types])
+FACTION_MATRIX = np.array([[card.faction == faction for faction in FACTIONS] for card in card_types], dtype=np.int64)
+
+EXPLORER = card_types.index(Explorer)
+
+STARTING_DECK = np.zeros(CARD_COUNT, dtype=np.int64)
+STARTING_DECK[card_types.index(Scout)] = 8
+STARTING_DECK[card_types.index(Viper)] = 2
+TRADE_DECK = np.repeat([card_types.index(card) for card in standard_deck], list(standard_deck.values()))
+
+# Which opponent base gets attacked first: outposts, then in card code order
+_ATTACK_RANK = np.where(IS_OUTPOST, 0, CARD_COUNT) + np.arange(CARD_COUNT)
+_NO_TARGET = 2 * CARD_COUNT
+_MAX_ROUNDS = 10
+
+
+class BatchPolicy(object):
+    # faction: only buy cards of this faction, unless walled off by an outpost (None buys anything)
+    # use_abilities: activate bases and ally abilities, as FactionStrategy does
+    # attack_bases: destroy every opposing base before attacking the player, rather than only outposts
+    def __init__(self, faction=None, use_abilities=False, attack_bases=False):
+        self.faction = faction
+        self.use_abilities = use_abilities
+        self.attack_bases = attack_bases
+
+
+def splurge_policy():
+    # SplurgeStrategy: play everything, buy the cheapest affordable card, attack through outposts
+    return BatchPolicy()
+
+
+def faction_policy(faction):
+    # FactionStrategy without scrapping: as splurge, but faction-only buying, bases, allies and base attacks
+    return BatchPolicy(faction, use_abilities=True, attack_bases=True)
+
+
+class BatchEngine(object):
+    player_names = ("Alice", "Bob")
+
+    def __init__(self, n, policy_1, policy_2, seed=None, max_turns=1000):
+        self.n = n
+        self.policies = (policy_1, policy_2)
+        self.rng = np.random.default_rng(seed)
+        self.max_turns = max_turns
+
+        self.deck = np.tile(STARTING_DECK, (n, 2, 1))
+        self.hand = np.zeros((n, 2, CARD_COUNT), dtype=np.int64)
+        self.discard = np.zeros((n, 2, CARD_COUNT), dtype=np.int64)
+        self.bases = np.zeros((n, 2, CARD_COUNT), dtype=np.int64)
+        self.authority = np.full((n, 2), 50.0)
+        self.forced_discards = np.zeros((n, 2), dtype=np.int64)
+
+        self.trade_deck = self.rng.permuted(np.tile(TRADE_DECK, (n, 1)), axis=1)
+        self.trade_row = self.trade_deck[:, :5].copy()
+        self.trade_cursor = np.full(n, 5)
+
+        self.alive = np.ones(n, dtype=bool)
+        self.victor = np.full(n, -1)
+        self.turn_number = np.zeros(n, dtype=np.int64)
+
+        self._draw(0, np.full(n, 3))
+        self._draw(1, np.full(n, 5))
+
+    def run(self):
+        # Returns a Counter of (victor, turn_number), like starstuff.play_games. Games still going after max_turns
+        # are left out.
+        for turn in range(1, self.max_turns + 1):
+            player = (turn - 1) % 2
+            self._take_turn(player, self.policies[player])
+
+            won = self.alive & (self.authority[:, 1 - player] <= 0)
+            self.victor[won] = player
+            self.turn_number[won] = turn
+            self.alive &= ~won
+            if not self.alive.any():
+                break
+
+        finished = self.victor >= 0
+        return Counter(zip([self.player_names[v] for v in self.victor[finished]], self.turn_number[finished].tolist()))
+
+    def _take_turn(self, p, policy):
+        o = 1 - p
+        active = self.alive
+
+        self._discard_at_random(p, np.where(active, self.forced_discards[:, p], 0))
+        self.forced_discards[:, p] = 0
+
+        values = np.zeros((self.n, 5))
+        if policy.use_abilities:
+            values += (self.bases[:, p] * active[:, None]) @ PRIMARY
+
+        # Play the whole hand, then anything drawn by it, until nothing more is drawn
+        played = np.zeros((self.n, CARD_COUNT), dtype=np.int64)
+        ally_used = np.zeros((self.n, CARD_COUNT), dtype=np.int64)
+        # Bases already in play count towards their faction, for ships and for each other
+        factions = (self.bases[:, p] * active[:, None]) @ FACTION_MATRIX
+        drawn = np.zeros(self.n, dtype=np.int64)
+        for _ in range(_MAX_ROUNDS):
+            new = self.hand[:, p] * active[:, None]
+            self.hand[:, p] -= new
+            new_bases = new * IS_BASE
+            new_ships = new - new_bases
+            played += new_ships
+            self.bases[:, p] += new_bases
+            factions += new @ FACTION_MATRIX
+
+            values += new_ships @ PRIMARY
+            if policy.use_abilities:
+                values += new_bases @ PRIMARY
+                ally_ready = ((factions >= 2) @ FACTION_MATRIX.T) > 0
+                allies = (played + self.bases[:, p] * active[:, None] - ally_used) * ally_ready
+                ally_used += allies
+                values += allies @ ALLY
+
+            to_draw = values[:, DRAW].astype(np.int64) - drawn
+            if not to_draw.any():
+                break
+            self._draw(p, to_draw)
+            drawn += to_draw
+
+        self.authority[:, p] += values[:, AUTHORITY]
+        self.forced_discards[:, o] += values[:, DISCARD].astype(np.int64)
+        self._buy(p, policy, values[:, TRADE], values[:, DAMAGE])
+        self._attack(p, policy, values[:, DAMAGE])
+
+        self.discard[:, p] += played
+        self._draw(p, np.where(active, 5, 0))
+
+    def _buy(self, p, policy, trade, damage):
+        rows = np.arange(self.n)
+        # As FactionStrategy, buy outside the faction when walled off by an outpost the damage can't break
+        walled = ((self.bases[:, 1 - p] * IS_OUTPOST * DEFENSE) > damage[:, None]).any(axis=1)
+        for _ in range(_MAX_ROUNDS):
+            codes = self.trade_row
+            in_row = codes >= 0
+            costs = np.where(in_row, COST[codes], np.inf)
+            allowed = in_row & (costs <= trade[:, None])
+            if policy.faction is not None:
+                in_faction = allowed & (FACTION_INDEX[codes] == FACTIONS.index(policy.faction))
+                allowed = np.where((walled & ~in_faction.any(axis=1))[:, None], allowed, in_faction)
+            costs = np.where(allowed, costs, np.inf)
+
+            slot = costs.argmin(axis=1)
+            buying = np.isfinite(costs[rows, slot]) & (trade > 0) & self.alive
+            if not buying.any():
+                break
+            buyers = rows[buying]
+            slots = slot[buying]
+            cards = codes[buyers, slots]
+
+            trade[buyers] -= COST[cards]
+            self.discard[buyers, p, cards] += 1
+
+            cursor = self.trade_cursor[buyers]
+            refills = np.where(cursor < TRADE_DECK.size,
+                               self.trade_deck[buyers, np.minimum(cursor, TRADE_DECK.size - 1)], -1)
+            self.trade_row[buyers, slots] = refills
+            self.trade_cursor[buyers] = cursor + 1
+
+        # As the strategies, walled off with nothing affordable left in the row, spend the rest on Explorers
+        stuck = walled & ~buying & self.alive
+        explorers = np.where(stuck, trade // COST[EXPLORER], 0).astype(np.int64)
+        self.discard[:, p, EXPLORER] += explorers
+        trade -= explorers * COST[EXPLORER]
+
+    def _attack(self, p, policy, damage):
+        o = 1 - p
+        rows = np.arange(self.n)
+        damage = damage * self.alive
+        for _ in range(_MAX_ROUNDS):
+            standing = self.bases[:, o] > 0
+            outposts = standing & IS_OUTPOST
+            # As the strategies: outposts while any stand, other bases only once they're gone
+            if policy.attack_bases:
+                targets = np.where(outposts.any(axis=1)[:, None], outposts, standing)
+            else:
+                targets = outposts
+            # Skip bases the damage can't destroy, as LegalMoves only offers AttackBase for bases the damage covers
+            targets &= DEFENSE <= damage[:, None]
+            ranks = np.where(targets, _ATTACK_RANK, _NO_TARGET)
+            target = ranks.argmin(axis=1)
+            attacking = (ranks[rows, target] < _NO_TARGET) & (damage > 0)
+            if not attacking.any():
+                break
+            attackers = rows[attacking]
+            cards = target[attacking]
+            self.bases[attackers, o, cards] -= 1
+            self.discard[attackers, o, cards] += 1
+            damage[attackers] -= DEFENSE[cards]
+
+        # Outposts still standing protect the player
+        blocked = (self.bases[:, o] * IS_OUTPOST).any(axis=1)
+        self.authority[:, o] -= np.where(blocked, 0, damage)
+
+    def _draw(self, p, counts):
+        # Draws counts[game] cards for player p, shuffling the discard pile into an empty deck as needed
+        rows = np.arange(self.n)
+        for j in range(int(counts.max(initial=0))):
+            drawing = counts > j
+            empty = drawing & (self.deck[:, p].sum(axis=1) == 0)
+            if empty.any():
+                self.deck[empty, p] += self.discard[empty, p]
+                self.discard[empty, p] = 0
+            drawing, cards = self._pick_at_random(self.deck[:, p], drawing)
+            drawers = rows[drawing]
+            self.deck[drawers, p, cards[drawing]] -= 1
+            self.hand[drawers, p, cards[drawing]] += 1
+
+    def _discard_at_random(self, p, counts):
+        rows = np.arange(self.n)
+        for j in range(int(counts.max(initial=0))):
+            discarding, cards = self._pick_at_random(self.hand[:, p], counts > j)
+            discarders = rows[discarding]
+            self.hand[discarders, p, cards[discarding]] -= 1
+            self.discard[discarders, p, cards[discarding]] += 1
+
+    def _pick_at_random(self, zone, picking):
+        # One card per game from a [game, card] count array, weighted by count; skips games with an empty zone
+        totals = zone.sum(axis=1)
+        picking = picking & (totals > 0)
+        thresholds = self.rng.random(self.n) * totals
+        cards = (zone.cumsum(axis=1) > thresholds[:, None]).argmax(axis=1)
+        return picking, cards
+
+
+def batch_play_games(n, policy_1, policy_2, seed=None):
+    return BatchEngine(n, policy_1, policy_2, seed=seed).run()
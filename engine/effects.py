@@ -1,48 +1,65 @@
-import logging
 from abc import ABC
 
+from engine.events import ValueGained, CardDrawn, DrawFailed, CardAcquired, CardDiscarded, NothingDiscarded, \
+    OpponentDiscardForced, BaseDestroyed, NoBaseDestroyed, CardScrapped, NothingScrapped, ShipCopied, EffectPending, \
+    ChoiceMade, NoScrapTargets
 from enums.enums import Zones, ValueTypes, Triggers, CardTypes, Factions
 from util.util import move_list_item
 
 
 class Effect(object):
+    # Every Effect and Move class declares its __slots__, as they're allocated for every action taken
+    __slots__ = ()
+
     def apply(self, gamestate):
         raise NotImplementedError
 
 
 # Immediate Effects
 class ValueEffect(Effect):
+    __slots__ = ("value_type", "amount", "attribute")
+
     def __init__(self, value_type, amount):
         super().__init__()
         self.value_type = value_type
         self.amount = amount
+        self.attribute = value_type.name.lower()  # Where PlayerState keeps it: player.trade, player.damage...
 
     def apply(self, gamestate):
         player = gamestate.active_player
-        player[self.value_type] += self.amount
-        logging.warning("{} GAINS {} {} ({})".format(
-            player.name, self.amount, self.value_type.name, player[self.value_type]))
+        total = getattr(player, self.attribute) + self.amount
+        setattr(player, self.attribute, total)
+        if gamestate.sinks:
+            gamestate.emit(ValueGained(player, self.value_type, self.amount, total))
 
     def __str__(self):
         return "{} {}".format(self.amount, self.value_type.name)
 
 
 class GainAuthority(ValueEffect):
+    __slots__ = ()
+
     def __init__(self, amount):
         super().__init__(ValueTypes.AUTHORITY, amount)
 
 
 class GainDamage(ValueEffect):
+    __slots__ = ()
+
     def __init__(self, amount):
         super().__init__(ValueTypes.DAMAGE, amount)
 
 
 class GainTrade(ValueEffect):
+    __slots__ = ()
+
     def __init__(self, amount):
         super().__init__(ValueTypes.TRADE, amount)
 
 
 class DrawEffect(Effect):
+    __slots__ = ("amount",)
+
     def __init__(self, amount):
         super().__init__()
         self.amount = amount
@@ -53,82 +70,90 @@ class DrawEffect(Effect):
             try:
                 player.draw(1)
             except IndexError:
-                logging.warning("{} DRAWS empty".format(player.name))
+                if gamestate.sinks:
+                    gamestate.emit(DrawFailed(player))
             else:
-                logging.warning("{} DRAWS a card".format(player.name))
+                if gamestate.sinks:
+                    gamestate.emit(CardDrawn(player, player.hand[-1]))
 
 
 class AcquireEffect(Effect):
+    __slots__ = ("card", "top_of_deck")
+
     def __init__(self, card, top_of_deck=False):
         self.card = card
         self.top_of_deck = top_of_deck
 
     def apply(self, gamestate):
-        if self.top_of_deck:
-            zone = Zones.DECK
-            suffix = " to top of deck"
-        else:
-            zone = Zones.DISCARD
-            suffix = ""
-
-        logging.warning("{} ACQUIRES {}{}".format(gamestate.active_player.name, self.card.name, suffix))
+        zone = Zones.DECK if self.top_of_deck else Zones.DISCARD
+        if gamestate.sinks:
+            gamestate.emit(CardAcquired(gamestate.active_player, self.card, self.top_of_deck))
 
         gamestate.remove_from_trade_row(self.card)
         self.card.move_to(zone, new_owner_id=gamestate.active_player.name)
-        gamestate.active_player[zone].append(self.card)
+        gamestate.active_player.zones[zone].append(self.card)
 
 
 class DiscardEffect(Effect):
+    __slots__ = ("cards",)
+
     def __init__(self, cards):
         self.cards = cards
 
     def apply(self, gamestate):
         if self.cards:
-            for card in self.cards:
-                logging.warning("{} DISCARDS {}".format(
-                    gamestate.active_player.name, [card.name for card in self.cards]))
-                card.move_to(Zones.DISCARD)
-                move_list_item(card, gamestate[Zones.HAND], gamestate[Zones.DISCARD])
-        else:
-            logging.warning("{} DOESN'T DISCARD".format(gamestate.active_player.name))
+            if gamestate.sinks:
+                for card in self.cards:
+                    gamestate.emit(CardDiscarded(gamestate.active_player, card))
+            gamestate.active_player.hand.transfer(gamestate.active_player.discard, cards=self.cards)
+        elif gamestate.sinks:
+            gamestate.emit(NothingDiscarded(gamestate.active_player))
 
 
 class OpponentDiscardEffect(Effect):
+    __slots__ = ()
+
     def apply(self, gamestate):
-        if gamestate.forced_discards:
-            gamestate.forced_discards += 1
-            logging.warning("{} must now DISCARD {} cards at start of turn".format(
-                gamestate.opponent.name, gamestate.forced_discards))
-        else:
-            gamestate.forced_discards = 1
-            logging.warning("{} must DISCARD 1 card at start of turn".format(gamestate.opponent.name))
+        gamestate.forced_discards += 1
+        if gamestate.sinks:
+            gamestate.emit(OpponentDiscardForced(gamestate.opponent, gamestate.forced_discards))
 
 
 class GainFactionEffect(Effect):
+    __slots__ = ("factions",)
+
     def __init__(self, *factions):
         self.factions = factions
 
     def apply(self, gamestate):
         gamestate.active_player.active_factions.update(self.factions)
+        gamestate.last_activated_card.touch()
         gamestate.last_activated_card.active_factions.update(self.factions)
 
 
 class DestroyBaseEffect(Effect):
+    __slots__ = ("base",)
+
     def __init__(self, base=None):
         self.base = base
 
     def apply(self, gamestate):
         if self.base:
-            logging.warning("{} DESTROYS {}".format(gamestate.active_player.name, self.base.name))
+            if gamestate.sinks:
+                gamestate.emit(BaseDestroyed(gamestate.active_player, self.base))
+            if self.base.passives:
+                gamestate.opponent.passives.unsubscribe(self.base)
             self.base.move_to(Zones.DISCARD)
             move_list_item(self.base,
-                           gamestate.opponent[Zones.IN_PLAY],
-                           gamestate.opponent[Zones.DISCARD])
-        else:
-            logging.warning("{} does not destroy a base".format(gamestate.active_player.name))
+                           gamestate.opponent.in_play,
+                           gamestate.opponent.discard)
+        elif gamestate.sinks:
+            gamestate.emit(NoBaseDestroyed(gamestate.active_player))
 
 
 class ScrapEffect(Effect):
+    __slots__ = ("cards",)
+
     def __init__(self, cards):
         self.cards = cards
 
@@ -136,28 +161,29 @@ class ScrapEffect(Effect):
         if self.cards:
             for card in self.cards:
                 origin_zone = card.location
-                logging.warning("{} is scrapping {} from {}".format(
-                    gamestate.active_player.name,
-                    card.name,
-                    origin_zone.name))
+                if gamestate.sinks:
+                    gamestate.emit(CardScrapped(gamestate.active_player, card, origin_zone))
 
                 card.move_to(Zones.SCRAP_HEAP)
-                gamestate[origin_zone].remove(card)
+                gamestate.zone(origin_zone).remove(card)
                 if origin_zone == Zones.TRADE_ROW:
                     gamestate.fill_trade_row()
 
-        else:
-            logging.warning("{} doesn't scrap anything".format(gamestate.active_player.name))
+        elif gamestate.sinks:
+            gamestate.emit(NothingScrapped(gamestate.active_player))
 
 
 class CopyShipEffect(Effect):
+    __slots__ = ("ship",)
+
     def __init__(self, ship):
         self.ship = ship
 
     def apply(self, gamestate):
-        logging.warning("{} COPIES {}".format(gamestate.active_player.name, self.ship.name))
+        if gamestate.sinks:
+            gamestate.emit(ShipCopied(gamestate.active_player, self.ship))
         needle = gamestate.last_activated_card
-        needle.available_abilities.update(self.ship.abilities)
+        needle.copy_abilities(self.ship)
         for effect in needle.trigger_ability(Triggers.SHIP):
             effect.apply(gamestate)
         if self.ship.faction != Factions.MACHINE_CULT:
@@ -166,49 +192,64 @@ class CopyShipEffect(Effect):
 
 
 class MachineBaseEffect(Effect):
+    __slots__ = ()
+
     def apply(self, gamestate):
         DrawEffect(1).apply(gamestate)
         PendScrap(Zones.HAND, mandatory=True).apply(gamestate)
 
 
 class BlobWorldDrawEffect(Effect):
+    __slots__ = ()
+
     def apply(self, gamestate):
         DrawEffect(gamestate.blob_cards_played_this_turn).apply(gamestate)
 
 
 class ShopToTopEffect(Effect):
+    __slots__ = ()
+
     def apply(self, gamestate):
         gamestate.freighter_hauls += 1
 
 
 class EmbassyYachtDrawEffect(Effect):
+    __slots__ = ()
+
     def apply(self, gamestate):
-        if len([c for c in gamestate[Zones.IN_PLAY] if c.card_type in [CardTypes.BASE, CardTypes.OUTPOST]]) >= 2:
+        if len(gamestate.active_player.bases.bases) >= 2:
             DrawEffect(2).apply(gamestate)
 
 
 # Pending Effects (requiring additional input from a player)
 class PendEffect(Effect, ABC):
+    __slots__ = ("gamestate",)
+
     def __init__(self):
         self.gamestate = None
 
     def apply(self, gamestate):
         self.gamestate = gamestate
         gamestate.pending_effects.append(self)
+        if gamestate.sinks:
+            gamestate.emit(EffectPending(gamestate.active_player, self))
 
     def resolve(self, *args, **kwargs):
         self._resolve(*args, **kwargs)
         self.gamestate.pending_effects.remove(self)
-        self.gamestate = None
+        # Cards share effect instances, so the same effect can be pending more than once (e.g. two Patrol Mechs)
+        if self not in self.gamestate.pending_effects:
+            self.gamestate = None
 
     def _resolve(self, *args, **kwargs):
         raise NotImplementedError
 
 
 class PendDestroyBase(PendEffect):
+    __slots__ = ()
+
     def apply(self, gamestate):
-        if any(gamestate.opponent[Zones.IN_PLAY]):
-            logging.warning("{} can DESTROY a Base".format(gamestate.active_player.name))
+        if any(gamestate.opponent.in_play):
             super().apply(gamestate)
 
     def _resolve(self, base):
@@ -216,20 +257,22 @@ class PendDestroyBase(PendEffect):
 
 
 class PendChoice(PendEffect):
+    __slots__ = ("choices",)
+
     def __init__(self, choices):
         super().__init__()
-        self.choices = {type(c): c for c in choices}
-
-    def apply(self, gamestate):
-        super().apply(gamestate)
-        logging.warning("{} can choose: {}".format(gamestate.active_player.name, self.choices))
+        # Ordered by name: choices usually arrive as a set, which iterates in a different order in every process
+        self.choices = {type(c): c for c in sorted(choices, key=lambda c: type(c).__name__)}
 
     def _resolve(self, choice):
-        logging.warning("{} is CHOOSING {}".format(self.gamestate.active_player.name, choice.__name__))
+        if self.gamestate.sinks:
+            self.gamestate.emit(ChoiceMade(self.gamestate.active_player, choice))
         self.choices[choice].apply(self.gamestate)
 
 
 class PendScrap(PendEffect):
+    __slots__ = ("zones", "up_to", "mandatory")
+
     def __init__(self, *zones, up_to=1, mandatory=False):
         super().__init__()
         self.zones = list(zones)
@@ -237,20 +280,18 @@ class PendScrap(PendEffect):
         self.mandatory = mandatory
 
     def apply(self, gamestate):
-        zone_names = [z.name for z in self.zones]
-        if any([gamestate[z] for z in self.zones]):
+        if any([gamestate.zone(z) for z in self.zones]):
             super().apply(gamestate)
-            logging.warning("{} {} SCRAP from: {}".format(
-                gamestate.active_player.name, "must" if self.mandatory else "can", zone_names))
-        else:
-            logging.warning("{} has no cards to scrap in: {}".format(
-                gamestate.active_player.name, zone_names))
+        elif gamestate.sinks:
+            gamestate.emit(NoScrapTargets(gamestate.active_player, self.zones))
 
     def _resolve(self, cards):
         ScrapEffect(cards).apply(self.gamestate)
 
 
 class PendBrainWorld(PendScrap):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(Zones.HAND, Zones.DISCARD, up_to=2, mandatory=False)
 
@@ -260,23 +301,20 @@ class PendBrainWorld(PendScrap):
 
 
 class PendDiscard(PendEffect):
+    __slots__ = ("up_to", "mandatory")
+
     def __init__(self, up_to=1, mandatory=False):
         super().__init__()
         self.up_to = up_to
         self.mandatory = mandatory
 
-    def apply(self, gamestate):
-        super().apply(gamestate)
-        if self.mandatory:
-            logging.warning("{} must DISCARD {}".format(gamestate.active_player.name, self.up_to))
-        else:
-            logging.warning("{} can DISCARD up to {}".format(gamestate.active_player.name, self.up_to))
-
     def _resolve(self, cards):
         DiscardEffect(cards).apply(self.gamestate)
 
 
 class PendRecycle(PendDiscard):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(up_to=2, mandatory=False)
 
@@ -286,19 +324,18 @@ class PendRecycle(PendDiscard):
 
 
 class PendCopyShip(PendEffect):
+    __slots__ = ()
+
     def apply(self, gamestate):
-        if len([c for c in gamestate[Zones.IN_PLAY] if c.card_type == CardTypes.SHIP]) > 1:
+        if len([c for c in gamestate.active_player.in_play if c.card_type == CardTypes.SHIP]) > 1:
             super().apply(gamestate)
-        logging.warning("{} can COPY A SHIP".format(gamestate.active_player.name))
 
     def _resolve(self, ship):
         CopyShipEffect(ship).apply(self.gamestate)
 
 
 class PendAcquireShipToTopForFree(PendEffect):
-    def apply(self, gamestate):
-        super().apply(gamestate)
-        logging.warning("{} can ACQUIRE A FREE SHIP TO TOP OF DECK".format(gamestate.active_player.name))
+    __slots__ = ()
 
     def _resolve(self, ship):
         AcquireEffect(ship, top_of_deck=True).apply(self.gamestate)
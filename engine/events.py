@@ -0,0 +1,213 @@
+import logging
+from typing import NamedTuple, Any
+
+from enums.enums import Triggers, Zones, ValueTypes
+
+
+# Events are emitted by Moves, Effects and GameState as the game is played. Emitting is always guarded by
+#     if gamestate.sinks:
+#         gamestate.emit(SomeEvent(...))
+# so a game without sinks never even builds the event. A sink is any callable accepting one event.
+
+class TradeRowCardAdded(NamedTuple):
+    card: Any
+
+
+class TradeRowEmpty(NamedTuple):
+    pass
+
+
+class CardPlayed(NamedTuple):
+    player: Any
+    card: Any
+
+
+class AbilityActivated(NamedTuple):
+    player: Any
+    card: Any
+    trigger: Triggers
+
+
+class ValueGained(NamedTuple):
+    player: Any
+    value_type: ValueTypes
+    amount: int
+    total: int
+
+
+class CardDrawn(NamedTuple):
+    player: Any
+    card: Any
+
+
+class DrawFailed(NamedTuple):
+    player: Any
+
+
+class CardAcquired(NamedTuple):
+    player: Any
+    card: Any
+    top_of_deck: bool
+
+
+class TradeSpent(NamedTuple):
+    player: Any
+    amount: int
+    remaining: int
+
+
+class CardDiscarded(NamedTuple):
+    player: Any
+    card: Any
+
+
+class NothingDiscarded(NamedTuple):
+    player: Any
+
+
+class OpponentDiscardForced(NamedTuple):
+    opponent: Any
+    total: int
+
+
+class BaseDestroyed(NamedTuple):
+    player: Any
+    base: Any
+
+
+class NoBaseDestroyed(NamedTuple):
+    player: Any
+
+
+class CardScrapped(NamedTuple):
+    player: Any
+    card: Any
+    origin_zone: Zones
+
+
+class NothingScrapped(NamedTuple):
+    player: Any
+
+
+class NoScrapTargets(NamedTuple):
+    player: Any
+    zones: list
+
+
+class ShipCopied(NamedTuple):
+    player: Any
+    ship: Any
+
+
+class EffectPending(NamedTuple):
+    player: Any
+    effect: Any
+
+
+class ChoiceMade(NamedTuple):
+    player: Any
+    choice: type
+
+
+class BaseAttacked(NamedTuple):
+    player: Any
+    base: Any
+    damage_remaining: int
+
+
+class OpponentAttacked(NamedTuple):
+    player: Any
+    opponent: Any
+    damage: int
+    authority_remaining: int
+
+
+class TurnEnded(NamedTuple):
+    player: Any
+
+
+class LoggingSink(object):
+    # The engine's original human-readable log: GameState(..., sinks=[LoggingSink()])
+    def __init__(self, log=logging.warning):
+        self.log = log
+
+    def __call__(self, event):
+        for line in _describe(event):
+            self.log(line)
+
+
+def _describe(event):
+    if isinstance(event, TradeRowCardAdded):
+        return ["Trade Row: {} added".format(event.card.name)]
+    if isinstance(event, TradeRowEmpty):
+        return ["Trade Row: Empty!"]
+    if isinstance(event, CardPlayed):
+        return ["{} is PLAYING: {}".format(event.player.name, event.card.name)]
+    if isinstance(event, AbilityActivated):
+        ability_text = "PRIMARY" if event.trigger in [Triggers.SHIP, Triggers.BASE] else event.trigger.name
+        return ["Activating {}'s {} ability".format(event.card.name, ability_text)]
+    if isinstance(event, ValueGained):
+        return ["{} GAINS {} {} ({})".format(event.player.name, event.amount, event.value_type.name, event.total)]
+    if isinstance(event, CardDrawn):
+        return ["{} DRAWS a card".format(event.player.name)]
+    if isinstance(event, DrawFailed):
+        return ["{} DRAWS empty".format(event.player.name)]
+    if isinstance(event, CardAcquired):
+        suffix = " to top of deck" if event.top_of_deck else ""
+        return ["{} ACQUIRES {}{}".format(event.player.name, event.card.name, suffix)]
+    if isinstance(event, TradeSpent):
+        return ["{} spent {} TRADE and has {} remaining".format(event.player.name, event.amount, event.remaining)]
+    if isinstance(event, CardDiscarded):
+        return ["{} DISCARDS {}".format(event.player.name, event.card.name)]
+    if isinstance(event, NothingDiscarded):
+        return ["{} DOESN'T DISCARD".format(event.player.name)]
+    if isinstance(event, OpponentDiscardForced):
+        if event.total == 1:
+            return ["{} must DISCARD 1 card at start of turn".format(event.opponent.name)]
+        return ["{} must now DISCARD {} cards at start of turn".format(event.opponent.name, event.total)]
+    if isinstance(event, BaseDestroyed):
+        return ["{} DESTROYS {}".format(event.player.name, event.base.name)]
+    if isinstance(event, NoBaseDestroyed):
+        return ["{} does not destroy a base".format(event.player.name)]
+    if isinstance(event, CardScrapped):
+        return ["{} is scrapping {} from {}".format(event.player.name, event.card.name, event.origin_zone.name)]
+    if isinstance(event, NothingScrapped):
+        return ["{} doesn't scrap anything".format(event.player.name)]
+    if isinstance(event, NoScrapTargets):
+        return ["{} has no cards to scrap in: {}".format(event.player.name, [z.name for z in event.zones])]
+    if isinstance(event, ShipCopied):
+        return ["{} COPIES {}".format(event.player.name, event.ship.name)]
+    if isinstance(event, EffectPending):
+        return ["{} {}".format(event.player.name, _describe_pending(event.effect))]
+    if isinstance(event, ChoiceMade):
+        return ["{} is CHOOSING {}".format(event.player.name, event.choice.__name__)]
+    if isinstance(event, BaseAttacked):
+        return ["{} has {} DAMAGE remaining".format(event.player.name, event.damage_remaining)]
+    if isinstance(event, OpponentAttacked):
+        return ["{} is ATTACKING {} for {} damage!".format(event.player.name, event.opponent.name, event.damage),
+                "{} has {} AUTHORITY remaining".format(event.opponent.name, event.authority_remaining)]
+    if isinstance(event, TurnEnded):
+        return ["{} is ENDING THEIR TURN".format(event.player.name)]
+    return [repr(event)]
+
+
+def _describe_pending(effect):
+    # Imported here because effects.py emits events, and so imports this module
+    from engine.effects import PendDestroyBase, PendChoice, PendScrap, PendDiscard, PendCopyShip, \
+        PendAcquireShipToTopForFree
+
+    if isinstance(effect, PendDestroyBase):
+        return "can DESTROY a Base"
+    if isinstance(effect, PendChoice):
+        return "can choose: {}".format([c.__name__ for c in effect.choices])
+    if isinstance(effect, PendScrap):
+        return "{} SCRAP from: {}".format("must" if effect.mandatory else "can", [z.name for z in effect.zones])
+    if isinstance(effect, PendDiscard):
+        if effect.mandatory:
+            return "must DISCARD {}".format(effect.up_to)
+        return "can DISCARD up to {}".format(effect.up_to)
+    if isinstance(effect, PendCopyShip):
+        return "can COPY A SHIP"
+    if isinstance(effect, PendAcquireShipToTopForFree):
+        return "can ACQUIRE A FREE SHIP TO TOP OF DECK"
+    return "has a pending {}".format(type(effect).__name__)
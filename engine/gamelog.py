@@ -0,0 +1,164 @@
+import mmap
+import os
+import struct
+from typing import NamedTuple, Any
+
+from components.decks import card_types
+from engine import events
+from engine.effects import GainTrade, GainDamage, GainAuthority, BlobWorldDrawEffect, PendRecycle, PendChoice, \
+    PendScrap, PendBrainWorld, PendDiscard, PendDestroyBase, PendCopyShip, PendAcquireShipToTopForFree
+from enums.enums import Triggers, ValueTypes, Zones
+
+# A game log is two files: the records themselves, appended game after game, and an index (path + ".idx") holding
+# a (byte offset, record count) pair per game, so a reader can seek straight to any game.
+#
+# Every event is one fixed-width record: event code, player seat (1 or 2; 0 if none), card code (0 if none) and
+# three event-specific integers, e.g. ValueGained stores (value type, amount, total).
+RECORD = struct.Struct("<BBHhhh")
+INDEX_ENTRY = struct.Struct("<QQ")
+
+# Codes are positions in these lists (card codes start at 1). Only ever append to them, or old logs become unreadable.
+EVENT_TYPES = [
+    events.TradeRowCardAdded, events.TradeRowEmpty, events.CardPlayed, events.AbilityActivated, events.ValueGained,
+    events.CardDrawn, events.DrawFailed, events.CardAcquired, events.TradeSpent, events.CardDiscarded,
+    events.NothingDiscarded, events.OpponentDiscardForced, events.BaseDestroyed, events.NoBaseDestroyed,
+    events.CardScrapped, events.NothingScrapped, events.NoScrapTargets, events.ShipCopied, events.EffectPending,
+    events.ChoiceMade, events.BaseAttacked, events.OpponentAttacked, events.TurnEnded]
+CARD_TYPES = [None] + card_types
+EFFECT_TYPES = [None, GainTrade, GainDamage, GainAuthority, BlobWorldDrawEffect, PendRecycle, PendChoice, PendScrap,
+                PendBrainWorld, PendDiscard, PendDestroyBase, PendCopyShip, PendAcquireShipToTopForFree]
+TRIGGERS = list(Triggers)
+VALUE_TYPES = list(ValueTypes)
+ZONES = list(Zones)
+
+EVENT_CODES = {event_type: code for code, event_type in enumerate(EVENT_TYPES)}
+CARD_CODES = {card_type: code for code, card_type in enumerate(CARD_TYPES)}
+EFFECT_CODES = {effect_type: code for code, effect_type in enumerate(EFFECT_TYPES)}
+
+
+class LogRecord(NamedTuple):
+    event_type: type
+    seat: int
+    card_type: Any
+    a: int
+    b: int
+    c: int
+
+
+def _encode(event):
+    # Returns (player, card, a, b, c) for one event
+    if isinstance(event, events.AbilityActivated):
+        return event.player, event.card, TRIGGERS.index(event.trigger), 0, 0
+    if isinstance(event, events.ValueGained):
+        return event.player, None, VALUE_TYPES.index(event.value_type), event.amount, event.total
+    if isinstance(event, events.CardAcquired):
+        return event.player, event.card, int(event.top_of_deck), 0, 0
+    if isinstance(event, events.TradeSpent):
+        return event.player, None, event.amount, event.remaining, 0
+    if isinstance(event, events.OpponentDiscardForced):
+        return event.opponent, None, event.total, 0, 0
+    if isinstance(event, events.BaseDestroyed):
+        return event.player, event.base, 0, 0, 0
+    if isinstance(event, events.CardScrapped):
+        return event.player, event.card, ZONES.index(event.origin_zone), 0, 0
+    if isinstance(event, events.NoScrapTargets):
+        return event.player, None, sum(1 << ZONES.index(z) for z in event.zones), 0, 0
+    if isinstance(event, events.ShipCopied):
+        return event.player, event.ship, 0, 0, 0
+    if isinstance(event, events.EffectPending):
+        return event.player, None, EFFECT_CODES.get(type(event.effect), 0), 0, 0
+    if isinstance(event, events.ChoiceMade):
+        return event.player, None, EFFECT_CODES.get(event.choice, 0), 0, 0
+    if isinstance(event, events.BaseAttacked):
+        return event.player, event.base, event.damage_remaining, 0, 0
+    if isinstance(event, events.OpponentAttacked):
+        return event.player, None, event.damage, event.authority_remaining, 0
+    return getattr(event, "player", None), getattr(event, "card", None), 0, 0, 0
+
+
+class GameLogWriter(object):
+    # An event sink. Usage:
+    #     with GameLogWriter(path) as log:
+    #         log.begin_game("Alice", "Bob")
+    #         ...play a GameState("Alice", "Bob", sinks=[log])...
+    #         log.end_game()
+    # Records are buffered per game and appended to any games already in the file.
+    def __init__(self, path):
+        self.path = path
+        self._data = open(path, "ab")
+        self._index = open(path + ".idx", "ab")
+        self._buffer = bytearray()
+        self._seats = {}
+        self._count = 0
+
+    def begin_game(self, p1_name, p2_name):
+        self._seats = {p1_name: 1, p2_name: 2}
+        self._buffer.clear()
+        self._count = 0
+
+    def __call__(self, event):
+        player, card, a, b, c = _encode(event)
+        self._buffer += RECORD.pack(EVENT_CODES[type(event)],
+                                    self._seats.get(player.name, 0) if player is not None else 0,
+                                    CARD_CODES.get(type(card), 0),
+                                    a, b, c)
+        self._count += 1
+
+    def end_game(self):
+        offset = self._data.tell()
+        self._data.write(self._buffer)
+        self._index.write(INDEX_ENTRY.pack(offset, self._count))
+        self._buffer.clear()
+        self._count = 0
+
+    def close(self):
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class GameLogReader(object):
+    # Memory-maps a log written by GameLogWriter. reader[i] decodes game i without touching any other game.
+    def __init__(self, path):
+        self._data_file = open(path, "rb")
+        self._index_file = open(path + ".idx", "rb")
+        self._data = self._map(self._data_file)
+        self._index = self._map(self._index_file)
+
+    @staticmethod
+    def _map(f):
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""  # mmap can't map an empty file
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return len(self._index) // INDEX_ENTRY.size
+
+    def raw(self, game):
+        # The game's records as a memoryview of packed bytes - RECORD.iter_unpack() it for plain integer codes
+        if not 0 <= game < len(self):
+            raise IndexError(game)
+        offset, count = INDEX_ENTRY.unpack_from(self._index, game * INDEX_ENTRY.size)
+        return memoryview(self._data)[offset:offset + count * RECORD.size]
+
+    def __getitem__(self, game):
+        return [LogRecord(EVENT_TYPES[event], seat, CARD_TYPES[card], a, b, c)
+                for event, seat, card, a, b, c in RECORD.iter_unpack(self.raw(game))]
+
+    def close(self):
+        for m in (self._data, self._index):
+            if isinstance(m, mmap.mmap):
+                m.close()
+        self._data_file.close()
+        self._index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
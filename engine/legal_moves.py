@@ -0,0 +1,140 @@
+from itertools import combinations
+
+from components.cards import StealthNeedle, TRIGGER_BITS
+from engine.effects import PendAcquireShipToTopForFree, PendChoice, PendCopyShip, PendDestroyBase, PendDiscard, \
+    PendScrap
+from engine.move import AcquireCard, AcquireShipToTopForFree, ActivateAlly, ActivateBase, ActivateScrap, AttackBase, \
+    AttackOpponent, Choose, CopyShip, DestroyBase, Discard, EndTurn, PlayCard, Scrap
+from enums.enums import CardTypes, Triggers
+
+BASE, ALLY, SCRAP = TRIGGER_BITS[Triggers.BASE], TRIGGER_BITS[Triggers.ALLY], TRIGGER_BITS[Triggers.SCRAP]
+
+
+class LegalMoves(object):
+    # Works out GameState.legal_moves(): every legal move for the active player. While an effect is pending, the moves
+    # are the ways to resolve the first one; nothing else can happen until it's resolved. Cards with the same name in
+    # the same zone are interchangeable, so there's one move per name rather than per card.
+    #
+    # The moves are kept between calls in parts - playing the hand, buying from the trade row, attacking - each with
+    # the zone versions and values it was built from, and a part is only rebuilt once one of those has changed. So a
+    # PlayCard rebuilds the hand's moves (and the buys, if it gave trade) but not the attacks. Activations depend on
+    # ability and faction state that cards don't version, and are cheap enough to rebuild every time.
+    __slots__ = ("_plays", "_acquires", "_attacks")
+
+    def __init__(self):
+        self._plays = (None, ())
+        self._acquires = (None, ())
+        self._attacks = (None, ())
+
+    def get(self, gamestate):
+        if gamestate.pending_effects:
+            return _pending_effect_moves(gamestate, gamestate.pending_effects[0])
+
+        player = gamestate.active_player
+        hand = player.hand
+        key = (id(hand), hand.version)
+        if self._plays[0] != key:
+            self._plays = (key, [PlayCard(card) for card in _distinct(hand)])
+
+        trade = player.trade
+        trade_row = gamestate.trade_row
+        key = (trade_row.version, trade, gamestate.freighter_hauls)
+        if self._acquires[0] != key:
+            self._acquires = (key, _acquire_moves(gamestate, trade))
+
+        damage = player.damage
+        bases = gamestate.opponent.in_play
+        key = (id(bases), bases.version, damage)
+        if self._attacks[0] != key:
+            self._attacks = (key, _attack_moves(gamestate, damage))
+
+        return self._plays[1] + _activation_moves(gamestate, player) + self._acquires[1] + self._attacks[1] + \
+            [EndTurn()]
+
+
+def _activation_moves(gamestate, player):
+    moves = []
+    for card in player.in_play:
+        available = card.available
+        if not available:
+            continue
+        if available & BASE:
+            moves.append(ActivateBase(card))
+        if available & ALLY:
+            move = ActivateAlly(card)
+            if move.is_legal(gamestate):
+                moves.append(move)
+        if available & SCRAP:
+            moves.append(ActivateScrap(card))
+    return moves
+
+
+def _acquire_moves(gamestate, trade):
+    moves = []
+    for card in _distinct(gamestate.trade_row):
+        if card.cost <= trade:
+            moves.append(AcquireCard(card))
+            if gamestate.freighter_hauls and card.card_type == CardTypes.SHIP:
+                moves.append(AcquireCard(card, top_of_deck=True))
+    if trade >= 2:
+        moves.append(AcquireCard())
+    return moves
+
+
+def _attack_moves(gamestate, damage):
+    if damage <= 0:
+        return []
+    bases = gamestate.opponent.bases
+    outposts = bases.outposts
+    moves = [AttackBase(base) for base in _distinct(outposts or bases.bases) if base.defense <= damage]
+    if not outposts:
+        moves.append(AttackOpponent(gamestate.opponent))
+    return moves
+
+
+def _pending_effect_moves(gamestate, effect):
+    if isinstance(effect, PendChoice):
+        return [Choose(choice) for choice in effect.choices]
+
+    if isinstance(effect, PendDiscard):
+        hand = gamestate.active_player.hand
+        sizes = [min(effect.up_to, len(hand))] if effect.mandatory else range(effect.up_to + 1)
+        return [Discard(*cards) for cards in _distinct_combinations(hand, sizes)]
+
+    if isinstance(effect, PendScrap):
+        targets = [card for zone in effect.zones for card in gamestate.zone(zone)]
+        sizes = [min(effect.up_to, len(targets))] if effect.mandatory else range(effect.up_to + 1)
+        return [Scrap(*cards) for cards in _distinct_combinations(targets, sizes)]
+
+    if isinstance(effect, PendDestroyBase):
+        bases = gamestate.opponent.bases
+        return [DestroyBase(base) for base in _distinct(bases.outposts or bases.bases)] or [DestroyBase()]
+
+    if isinstance(effect, PendCopyShip):
+        return [CopyShip(ship) for ship in _distinct(gamestate.active_player.in_play)
+                if ship.is_ship() and not isinstance(ship, StealthNeedle)]
+
+    if isinstance(effect, PendAcquireShipToTopForFree):
+        return [AcquireShipToTopForFree(ship) for ship in _distinct(gamestate.trade_row) if ship.is_ship()] + \
+               [AcquireShipToTopForFree()]
+
+    raise RuntimeError  # New PendEffect types need their moves listed here
+
+
+def _distinct(cards):
+    # The first card of each name
+    distinct = {}
+    for card in cards:
+        distinct.setdefault(card.name, card)
+    return list(distinct.values())
+
+
+def _distinct_combinations(cards, sizes):
+    # Combinations of cards that differ by more than which copy of a card they use. Scrap targets can be in
+    # different zones, so location counts as well as name.
+    seen = {}
+    for size in sizes:
+        for cards_combination in combinations(cards, size):
+            names = tuple(sorted((card.location.name, card.name) for card in cards_combination))
+            seen.setdefault(names, cards_combination)
+    return list(seen.values())
@@ -1,41 +1,49 @@
-import logging
 from abc import ABC
 
-from components.cards import Explorer, FleetHQ
+from components.cards import Explorer
+from engine.events import AbilityActivated, CardPlayed, TradeSpent, BaseAttacked, OpponentAttacked, TurnEnded
 from engine.effects import PendScrap, PendChoice, PendDiscard, DestroyBaseEffect, PendDestroyBase, PendCopyShip,\
-    AcquireEffect, PendAcquireShipToTopForFree, GainDamage
-from enums.enums import Zones, CardTypes, Triggers, ValueTypes, Factions
+    AcquireEffect, PendAcquireShipToTopForFree
+from enums.enums import Zones, CardTypes, Triggers, Factions, Passives
 from util.util import move_list_item
 
 
 class Move(ABC):
+    __slots__ = ()
+
     def execute(self, gamestate):
         self._validate(gamestate)
         self._execute(gamestate)
 
+    def is_legal(self, gamestate):
+        # Whether execute() would go through, answered without raising, for filtering candidate moves
+        raise NotImplementedError
+
     def _execute(self, gamestate):
         raise NotImplementedError
 
     def _validate(self, gamestate):
-        raise NotImplementedError
+        if not self.is_legal(gamestate):
+            raise FileNotFoundError
 
 
 class AbilityActivation(Move, ABC):
+    __slots__ = ("card",)
+
     trigger = None
 
     def __init__(self, card):
         self.card = card
 
+    def is_legal(self, gamestate):
+        return self.card.can_trigger(self.trigger) and self.card in gamestate.active_player.in_play
+
     def _execute(self, gamestate):
         self.activate_ability(gamestate)
 
     def activate_ability(self, gamestate):
-        if self.trigger in [Triggers.SHIP, Triggers.BASE]:
-            ability_text = "PRIMARY"
-        else:
-            ability_text = self.trigger.name
-
-        logging.warning("Activating {}'s {} ability".format(self.card.name, ability_text))
+        if gamestate.sinks:
+            gamestate.emit(AbilityActivated(gamestate.active_player, self.card, self.trigger))
         for effect in self.card.trigger_ability(self.trigger):
             # These need to occur in this order so that effects will apply to this card
             gamestate.last_activated_card = self.card
@@ -43,29 +51,38 @@ class AbilityActivation(Move, ABC):
 
 
 class PlayCard(AbilityActivation):
+    __slots__ = ()
+
     trigger = Triggers.SHIP
 
+    def is_legal(self, gamestate):
+        return self.card in gamestate.active_player.hand
+
     def _validate(self, gamestate):
         pass  # No validation - allowing KeyError if card is not in hand
 
     def _execute(self, gamestate):
-        logging.warning("{} is PLAYING: {}".format(gamestate.active_player.name, self.card.name))
+        if gamestate.sinks:
+            gamestate.emit(CardPlayed(gamestate.active_player, self.card))
         self.card.move_to(Zones.IN_PLAY)
         gamestate.active_player.active_factions.update(self.card.active_factions)
         move_list_item(self.card,
-                       gamestate.active_player[Zones.HAND],
-                       gamestate.active_player[Zones.IN_PLAY])
+                       gamestate.active_player.hand,
+                       gamestate.active_player.in_play)
+        if self.card.passives:
+            gamestate.active_player.passives.subscribe(self.card)
 
         if self.card.faction == Factions.BLOB:
             gamestate.blob_cards_played_this_turn += 1
 
         if self.card.card_type == CardTypes.SHIP:
-            if any([isinstance(card, FleetHQ) for card in gamestate[Zones.IN_PLAY]]):
-                GainDamage(1).apply(gamestate)
+            gamestate.active_player.passives.dispatch(Passives.SHIP_PLAYED, gamestate)
             self.activate_ability(gamestate)
 
 
 class ActivateBase(AbilityActivation):
+    __slots__ = ()
+
     trigger = Triggers.BASE
 
     def _validate(self, gamestate):
@@ -73,19 +90,32 @@ class ActivateBase(AbilityActivation):
 
 
 class ActivateAlly(AbilityActivation):
+    __slots__ = ()
+
     trigger = Triggers.ALLY
 
+    def is_legal(self, gamestate):
+        return super().is_legal(gamestate) and self._is_allied(gamestate)
+
     def _validate(self, gamestate):
+        # Only the faction check: an ally ability that's been used fails with a KeyError, as for the other triggers
+        if not self._is_allied(gamestate):
+            raise FileNotFoundError
+
+    def _is_allied(self, gamestate):
         if gamestate.active_player.active_factions[self.card.faction] <= 1:
             # This is pretty much just for stealth needle
             if len(self.card.active_factions) > 1:
                 other_faction = [f for f in self.card.active_factions if f != self.card.faction][0]
                 if gamestate.active_player.active_factions[other_faction] > 1:
-                    return
-            raise FileNotFoundError
+                    return True
+            return False
+        return True
 
 
 class ActivateScrap(AbilityActivation):
+    __slots__ = ()
+
     trigger = Triggers.SCRAP
 
     def _validate(self, gamestate):
@@ -96,11 +126,15 @@ class ActivateScrap(AbilityActivation):
         self.activate_ability(gamestate)
         gamestate.active_player.active_factions.subtract(self.card.active_factions)
 
+        if self.card.passives:
+            gamestate.active_player.passives.unsubscribe(self.card)
         self.card.move_to(Zones.SCRAP_HEAP)
-        gamestate.active_player[Zones.IN_PLAY].remove(self.card)
+        gamestate.active_player.in_play.remove(self.card)
 
 
 class AcquireCard(Move):
+    __slots__ = ("card", "top_of_deck")
+
     def __init__(self, card=None, explorer=True, top_of_deck=False):
         self.top_of_deck = top_of_deck
 
@@ -111,78 +145,80 @@ class AcquireCard(Move):
         else:
             raise ValueError
 
-    def _validate(self, gamestate):
+    def is_legal(self, gamestate):
         if self.top_of_deck:
             if self.card.card_type != CardTypes.SHIP or gamestate.freighter_hauls < 1:
-                raise FileNotFoundError
-        if gamestate[ValueTypes.TRADE] < self.card.cost:
-            raise FileNotFoundError
+                return False
+        if gamestate.active_player.trade < self.card.cost:
+            return False
+        return isinstance(self.card, Explorer) or self.card in gamestate.trade_row
 
     def _execute(self, gamestate):
         if gamestate.pending_effects:
             pending_effect = gamestate.pending_effects[0]
             if isinstance(pending_effect, PendAcquireShipToTopForFree):
+                pending_effect.gamestate = gamestate
                 pending_effect.resolve(self.card)
         else:
-            gamestate.active_player[ValueTypes.TRADE] -= self.card.cost
+            gamestate.active_player.trade -= self.card.cost
             if gamestate.freighter_hauls and self.card.card_type == CardTypes.SHIP:
                 gamestate.freighter_hauls -= 1
             AcquireEffect(self.card, self.top_of_deck).apply(gamestate)
-            logging.warning("{} spent {} TRADE and has {} remaining".format(
-                gamestate.active_player.name,
-                self.card.cost,
-                gamestate.active_player[ValueTypes.TRADE]))
+            if gamestate.sinks:
+                gamestate.emit(TradeSpent(gamestate.active_player, self.card.cost,
+                                          gamestate.active_player.trade))
 
 
 class AttackBase(Move):
+    __slots__ = ("base",)
+
     def __init__(self, base):
         self.base = base
 
-    def _validate(self, gamestate):
-        if self.base.card_type != CardTypes.OUTPOST:
-            if any([c.card_type == CardTypes.OUTPOST for c in gamestate.opponent[Zones.IN_PLAY]]):
-                raise FileNotFoundError
+    def is_legal(self, gamestate):
+        if self.base.card_type != CardTypes.OUTPOST and gamestate.opponent.bases.outposts:
+            return False
+        return gamestate.active_player.damage >= self.base.defense and self.base in gamestate.opponent.in_play
 
     def _execute(self, gamestate):
-        gamestate.active_player[ValueTypes.DAMAGE] -= self.base.defense
+        gamestate.active_player.damage -= self.base.defense
         DestroyBaseEffect(self.base).apply(gamestate)
 
-        logging.warning("{} has {} DAMAGE remaining".format(
-            gamestate.active_player.name,
-            gamestate.active_player[ValueTypes.AUTHORITY]))
+        if gamestate.sinks:
+            gamestate.emit(BaseAttacked(gamestate.active_player, self.base, gamestate.active_player.damage))
 
 
 class AttackOpponent(Move):
+    __slots__ = ("opponent",)
+
     def __init__(self, opponent):
         self.opponent = opponent
 
-    def _validate(self, gamestate):
-        opponent_has_outpost = any([c.card_type == CardTypes.OUTPOST for c in gamestate.opponent[Zones.IN_PLAY]])
-        if opponent_has_outpost:
-            raise FileNotFoundError
+    def is_legal(self, gamestate):
+        return gamestate.active_player.damage > 0 and not gamestate.opponent.bases.outposts
 
     def _execute(self, gamestate):
-        logging.warning("{} is ATTACKING {} for {} damage!".format(
-            gamestate.active_player.name,
-            self.opponent.name,
-            gamestate.active_player[ValueTypes.DAMAGE]))
-
-        self.opponent[ValueTypes.AUTHORITY] -= gamestate.active_player[ValueTypes.DAMAGE]
-        gamestate.active_player[ValueTypes.DAMAGE] = 0
+        damage = gamestate.active_player.damage
+        self.opponent.authority -= damage
+        gamestate.active_player.damage = 0
 
-        logging.warning("{} has {} AUTHORITY remaining".format(self.opponent.name,
-                                                               self.opponent[ValueTypes.AUTHORITY]))
+        if gamestate.sinks:
+            gamestate.emit(OpponentAttacked(gamestate.active_player, self.opponent, damage,
+                                            self.opponent.authority))
 
-        if gamestate.opponent[ValueTypes.AUTHORITY] <= 0:
+        if gamestate.opponent.authority <= 0:
             gamestate.victor = gamestate.active_player.name
 
 
 class EndTurn(Move):
-    def _validate(self, gamestate):
-        pass
+    __slots__ = ()
+
+    def is_legal(self, gamestate):
+        return True
 
     def _execute(self, gamestate):
-        logging.warning("{} is ENDING THEIR TURN".format(gamestate.active_player.name))
+        if gamestate.sinks:
+            gamestate.emit(TurnEnded(gamestate.active_player))
         gamestate.next_turn()
         if gamestate.forced_discards:
             PendDiscard(up_to=gamestate.forced_discards, mandatory=True).apply(gamestate)
@@ -190,6 +226,8 @@ class EndTurn(Move):
 
 
 class PendingMove(Move, ABC):
+    __slots__ = ("effect",)
+
     resolved_effect_type = None
 
     def __init__(self):
@@ -198,9 +236,24 @@ class PendingMove(Move, ABC):
 
     def execute(self, gamestate):
         self.effect = [e for e in gamestate.pending_effects if isinstance(e, self.resolved_effect_type)][0]
+        # Effect instances are shared, so this one may have last been applied in a clone or before a restore
+        self.effect.gamestate = gamestate
         self._validate(gamestate)
         self._execute(gamestate)
 
+    def is_legal(self, gamestate):
+        for effect in gamestate.pending_effects:
+            if isinstance(effect, self.resolved_effect_type):
+                return self._can_resolve(gamestate, effect)
+        return False
+
+    def _validate(self, gamestate):
+        if not self._can_resolve(gamestate, self.effect):
+            raise FileNotFoundError
+
+    def _can_resolve(self, gamestate, effect):
+        raise NotImplementedError
+
     def _execute(self, gamestate):
         self._resolve_effect()
 
@@ -209,88 +262,104 @@ class PendingMove(Move, ABC):
 
 
 class Discard(PendingMove):
+    __slots__ = ("cards",)
+
     resolved_effect_type = PendDiscard
 
     def __init__(self, *cards):
         super().__init__()
         self.cards = cards
 
-    def _validate(self, gamestate):
-        if self.effect.mandatory\
-                and len(self.cards) < self.effect.up_to\
-                and len(self.cards) < len(gamestate[Zones.HAND]):
-            raise FileNotFoundError
+    def _can_resolve(self, gamestate, effect):
+        if effect.mandatory\
+                and len(self.cards) < effect.up_to\
+                and len(self.cards) < len(gamestate.active_player.hand):
+            return False
+        hand = gamestate.active_player.hand
+        return len(self.cards) <= effect.up_to and all(card in hand for card in self.cards)
 
     def _resolve_effect(self):
         self.effect.resolve(self.cards)
 
 
 class Choose(PendingMove):
+    __slots__ = ("choice",)
+
     resolved_effect_type = PendChoice
 
     def __init__(self, choice):
         super().__init__()
         self.choice = choice
 
-    def _validate(self, gamestate):
-        if self.choice not in self.effect.choices:
-            raise FileNotFoundError
+    def _can_resolve(self, gamestate, effect):
+        return self.choice in effect.choices
 
     def _resolve_effect(self):
         self.effect.resolve(self.choice)
 
 
 class Scrap(PendingMove):
+    __slots__ = ("targets",)
+
     resolved_effect_type = PendScrap
 
     def __init__(self, *targets):
         super().__init__()
         self.targets = targets
 
-    def _validate(self, gamestate):
+    def _can_resolve(self, gamestate, effect):
+        zones = [gamestate.zone(zone) for zone in effect.zones]
         for target in self.targets:
-            if target.location not in self.effect.zones:
-                raise FileNotFoundError
-        if self.effect.mandatory:
-            if len(self.targets) < self.effect.up_to:
-                raise FileNotFoundError
+            if not any(target in zone for zone in zones):
+                return False
+        if effect.mandatory:
+            if len(self.targets) < effect.up_to:
+                return False
+        return len(self.targets) <= effect.up_to
 
     def _resolve_effect(self):
         self.effect.resolve(self.targets)
 
 
 class DestroyBase(PendingMove):
+    __slots__ = ("target",)
+
     resolved_effect_type = PendDestroyBase
 
     def __init__(self, target=None):
         super().__init__()
         self.target = target
 
-    def _validate(self, gamestate):
-        opponent_has_outpost = any([c.card_type == CardTypes.OUTPOST for c in gamestate.opponent[Zones.IN_PLAY]])
-        if opponent_has_outpost and self.target.card_type != CardTypes.OUTPOST:
-            raise FileNotFoundError
+    def _can_resolve(self, gamestate, effect):
+        if self.target is None:
+            return True  # Declining
+        if self.target.card_type != CardTypes.OUTPOST and gamestate.opponent.bases.outposts:
+            return False
+        return self.target in gamestate.opponent.in_play
 
     def _resolve_effect(self):
         self.effect.resolve(self.target)
 
 
 class CopyShip(PendingMove):
+    __slots__ = ("ship",)
+
     resolved_effect_type = PendCopyShip
 
     def __init__(self, ship):
         super().__init__()
         self.ship = ship
 
-    def _validate(self, gamestate):
-        if self.ship not in gamestate[Zones.IN_PLAY]:
-            raise FileNotFoundError
+    def _can_resolve(self, gamestate, effect):
+        return self.ship in gamestate.active_player.in_play
 
     def _resolve_effect(self):
         self.effect.resolve(self.ship)
 
 
 class AcquireShipToTopForFree(PendingMove):
+    __slots__ = ("ship",)
+
     resolved_effect_type = PendAcquireShipToTopForFree
 
     def __init__(self, ship=None, explorer=True):
@@ -302,9 +371,8 @@ class AcquireShipToTopForFree(PendingMove):
         else:
             raise ValueError
 
-    def _validate(self, gamestate):
-        if self.ship not in gamestate[Zones.TRADE_ROW] and not isinstance(self.ship, Explorer):
-            raise FileNotFoundError
+    def _can_resolve(self, gamestate, effect):
+        return self.ship in gamestate.trade_row or isinstance(self.ship, Explorer)
 
     def _resolve_effect(self):
         self.effect.resolve(self.ship)
@@ -1,38 +1,66 @@
-import logging
-from itertools import cycle
-from random import shuffle
+from random import Random
 
 from components.cards import Explorer
-from enums.enums import Zones
-from engine.state.playerstate import PlayerState
-from components.decks import get_fresh_trade_deck
+from engine.events import TradeRowCardAdded, TradeRowEmpty
+from engine.legal_moves import LegalMoves
+from enums.enums import Passives, Zones
+from engine.state.journal import Journal
+from engine.state.playerstate import PlayerState, VALUE_ATTRIBUTES
+from engine.state.zone import Zone, TradeDeck
+from components.decks import get_fresh_trade_deck, standard_deck
 
 
-logger = logging.getLogger()
-logger.setLevel(logging.WARNING)
+class GameState(object):
+    def __init__(self, p1_name, p2_name, seed=None, rng=None, sinks=None):
+        # Event sinks (see engine.events); with none attached, the engine doesn't build any events at all
+        self.sinks = list(sinks) if sinks else []
 
+        # Every shuffle and every Strategy decision draws from this, so a seed replays a whole game
+        self.rng = rng if rng is not None else Random(seed)
 
-class GameState(object):
-    def __init__(self, p1_name, p2_name):
-        player1 = PlayerState(name=p1_name, first_player=True)
-        player2 = PlayerState(name=p2_name, first_player=False)
+        # Every card in the game gets a distinct card_id: the trade deck's come first, then each player's
+        first_card_id = sum(standard_deck.values())
+        player1 = PlayerState(name=p1_name, first_player=True, rng=self.rng, first_card_id=first_card_id)
+        player2 = PlayerState(name=p2_name, first_player=False, rng=self.rng, first_card_id=first_card_id + 10)
         self.players = {
             p1_name: player1,
             p2_name: player2}
+        self._seating = (player1, player2)
+
+        self._trade_cards = get_fresh_trade_deck()
+        self.trade_deck = TradeDeck()
+        self.trade_row = Zone(Zones.TRADE_ROW)
+        self.pending_effects = []
+        self.journal = None
+        self._legal_moves = LegalMoves()
+        self._deal()
 
-        self.trade_deck = get_fresh_trade_deck()
-        shuffle(self.trade_deck)
+    def reset(self, seed=None):
+        # Starts a new game with the same players and cards, exactly as GameState(p1_name, p2_name, seed=seed) would,
+        # but without allocating any of it again. Sinks stay attached; journaling stops.
+        if self.journal is not None:
+            self.stop_journal()
+        self.rng.seed(seed)
+        self._seating[0].reset(first_player=True)
+        self._seating[1].reset(first_player=False)
+        self._deal()
 
-        self.trade_row = []
+    def _deal(self):
+        # Everything after the players' starting hands: the trade deck and row, and the turn state
+        for card in self._trade_cards:
+            card.exhaust()
+            card.owner_id = None
+            card.location = Zones.TRADE_DECK
+        self.trade_deck.reset(self._trade_cards, self.rng)
+
+        self.trade_row.clear()
         self.fill_trade_row()
 
         self.turn_number = 1
-        self._turn_order = cycle([player1, player2])
-        self.active_player = next(self._turn_order)
-        self.opponent = player2
+        self.active_player, self.opponent = self._seating
 
         self.victor = None
-        self.pending_effects = []
+        self.pending_effects.clear()
 
         # Hacky? Yes! Works? Yes!
         self.forced_discards = 0
@@ -40,21 +68,154 @@ class GameState(object):
         self.blob_cards_played_this_turn = 0
         self.freighter_hauls = 0
 
+        # Explorers get their card_ids when acquired, counting up from just past the trade and starting cards
+        self.next_card_id = len(self._trade_cards) + sum(len(player._starting_cards) for player in self._seating)
+
+    def clone(self, sinks=None):
+        # An independent copy of the game for lookahead, far cheaper than copy.deepcopy: cards, zones, players and the
+        # RNG are copied, effects are shared (as cards already share them). Moves must be built against the clone's
+        # own cards. To try a line and rewind the same game, snapshot() and restore() are cheaper still.
+        card_copies = {card: card.copy() for card in self._cards()}
+
+        gamestate = GameState.__new__(GameState)
+        gamestate.sinks = list(sinks) if sinks else []
+        gamestate.rng = Random()
+        gamestate.rng.setstate(self.rng.getstate())
+
+        gamestate._seating = tuple(player.copy(gamestate.rng, card_copies) for player in self._seating)
+        gamestate.players = {player.name: player for player in gamestate._seating}
+        gamestate.active_player = gamestate.players[self.active_player.name]
+        gamestate.opponent = gamestate.players[self.opponent.name]
+
+        gamestate._trade_cards = [card_copies[card] for card in self._trade_cards]
+        gamestate.trade_deck = self.trade_deck.copy(card_copies)
+        gamestate.trade_row = self.trade_row.copy(card_copies)
+        gamestate.pending_effects = list(self.pending_effects)
+        gamestate.journal = None
+        gamestate._legal_moves = LegalMoves()
+
+        gamestate.turn_number = self.turn_number
+        gamestate.victor = self.victor
+        gamestate.forced_discards = self.forced_discards
+        gamestate.last_activated_card = card_copies.get(self.last_activated_card, self.last_activated_card)
+        gamestate.blob_cards_played_this_turn = self.blob_cards_played_this_turn
+        gamestate.freighter_hauls = self.freighter_hauls
+        gamestate.next_card_id = self.next_card_id
+        return gamestate
+
+    def snapshot(self):
+        # Everything a game can change, for restore() to rewind this GameState to. Cards keep their identity, so Moves
+        # built before the snapshot still work after a restore, and a snapshot can be restored any number of times.
+        return (self._frame(),
+                [(card, card.snapshot()) for card in self._cards()],
+                [(zone, zone.snapshot()) for zone in self._zones()])
+
+    def restore(self, snapshot):
+        frame, cards, zones = snapshot
+        self._restore_frame(frame)
+        for card, card_snapshot in cards:
+            card.restore(card_snapshot)
+        for zone, zone_snapshot in zones:
+            zone.restore(zone_snapshot)
+
+    def legal_moves(self):
+        # Every legal move for the active player, kept up to date between calls; see engine.legal_moves
+        return self._legal_moves.get(self)
+
+    def checkpoint(self):
+        # Marks a point to undo() back to, and starts journaling if it hadn't. While journaling, cards and zones record
+        # their state the first time they change after each checkpoint (see engine.state.journal), so trying a move
+        # and undoing it costs about as much as the move itself, far less than snapshot() or clone(). Checkpoints
+        # nest: undoing one also undoes every checkpoint made after it.
+        if self.journal is None:
+            self._attach_journal(Journal())
+        return self.journal.checkpoint(self._frame())
+
+    def undo(self, checkpoint):
+        if self.journal is None:
+            raise IndexError("no checkpoint {}".format(checkpoint))
+        self._restore_frame(self.journal.undo(checkpoint))
+
+    def release(self, checkpoint):
+        # Keeps the game as it is and forgets the checkpoint (and every later one), with what it saved to undo
+        if self.journal is None:
+            raise IndexError("no checkpoint {}".format(checkpoint))
+        self.journal.release(checkpoint)
+
+    def stop_journal(self):
+        # Stops journaling, keeping the game as it is; the checkpoints can't be undone after this
+        if self.journal is not None:
+            self.journal.detach_all()
+        self.journal = None
+
+    def _attach_journal(self, journal):
+        self.journal = journal
+        for card in self._cards():
+            journal.attach(card)
+        for zone in self._zones():
+            journal.attach(zone)
+
+    def _frame(self):
+        # The state that isn't kept in cards or zones, small enough to save whole at every checkpoint
+        return (self.rng.getstate(),
+                tuple(player.snapshot() for player in self._seating),
+                self.trade_deck.snapshot(),
+                tuple(self.pending_effects),
+                self.active_player,
+                self.opponent,
+                self.turn_number,
+                self.victor,
+                self.forced_discards,
+                self.last_activated_card,
+                self.blob_cards_played_this_turn,
+                self.freighter_hauls,
+                self.next_card_id)
+
+    def _restore_frame(self, frame):
+        (rng_state, players, trade_deck, pending_effects,
+         self.active_player, self.opponent, self.turn_number, self.victor, self.forced_discards,
+         self.last_activated_card, self.blob_cards_played_this_turn, self.freighter_hauls, self.next_card_id) = frame
+
+        self.rng.setstate(rng_state)
+        for player, player_snapshot in zip(self._seating, players):
+            player.restore(player_snapshot)
+        self.trade_deck.restore(trade_deck)
+        self.pending_effects[:] = pending_effects
+
+    def _zones(self):
+        return [zone for player in self._seating for zone in player.zones.values()] + [self.trade_row]
+
+    def _cards(self):
+        # Every card whose state can still change: the trade cards, the starting cards and any Explorers in a zone
+        cards = dict.fromkeys(self._trade_cards)
+        for player in self._seating:
+            cards.update(dict.fromkeys(player._starting_cards))
+            for zone in player.zones.values():
+                cards.update(dict.fromkeys(zone))
+        return cards
+
+    def zone(self, key):
+        # The trade row or one of the active player's zones, for code with a Zones value in hand
+        if key is Zones.TRADE_ROW:
+            return self.trade_row
+        return self.active_player.zones[key]
+
     def __getitem__(self, key):
-        try:
-            return self.players[key]
-        except KeyError:
-            try:
-                # This allows player-state access without a player id, but only to the active player.
-                # This works untless we need to start accessing the inactive player's stuff,
-                return self.active_player[key]
-            except KeyError:
-                if key == Zones.TRADE_ROW:
-                    return self.trade_row
-                elif key == Zones.TRADE_DECK:
-                    return self.trade_deck
-                elif isinstance(key, tuple):  # Ensure old (player, zone) key strategy isn't in use
-                    raise RuntimeError
+        # Kept for old callers; the attributes (gamestate.trade_row, gamestate.active_player.hand...) are quicker
+        player = self.players.get(key)
+        if player is not None:
+            return player
+        if key is Zones.TRADE_ROW:
+            return self.trade_row
+        if key is Zones.TRADE_DECK:
+            return self.trade_deck
+        if isinstance(key, tuple):  # Ensure old (player, zone) key strategy isn't in use
+            raise RuntimeError
+        # This allows player-state access without a player id, but only to the active player.
+        attribute = VALUE_ATTRIBUTES.get(key)
+        if attribute is not None:
+            return getattr(self.active_player, attribute)
+        return self.active_player.zones.get(key)
 
     def remove_from_trade_row(self, card):
         try:
@@ -62,26 +223,27 @@ class GameState(object):
         except ValueError:
             if not isinstance(card, Explorer):
                 raise
+            card.card_id = self.next_card_id
+            self.next_card_id += 1
         self.fill_trade_row()
 
     def fill_trade_row(self):
-        cards_in_row = len(self.trade_row)
-        empty_slots = 5 - cards_in_row
-        new_cards = self.trade_deck[:empty_slots]
-        if new_cards:
+        new_cards = self.trade_deck.deal(5 - len(self.trade_row))
+        if self.sinks:
             for new_card in new_cards:
-                logging.warning("Trade Row: {} added".format(new_card.name))
-                new_card.move_to(Zones.TRADE_ROW)
-                self.trade_row.append(new_card)
-        else:
-            logging.warning("Trade Row: Empty!")
+                self.emit(TradeRowCardAdded(new_card))
+            if not new_cards:
+                self.emit(TradeRowEmpty())
+        self.trade_row.extend(new_cards)
 
-        self.trade_deck[:empty_slots] = []
+    def emit(self, event):
+        for sink in self.sinks:
+            sink(event)
 
     def next_turn(self):
         self.active_player.end_turn()  # The King is dead.
         self.turn_number += 1
         self.blob_cards_played_this_turn = 0
-        self.opponent = self.active_player
-        self.active_player = next(self._turn_order)
+        self.active_player, self.opponent = self.opponent, self.active_player
         self.active_player.start_turn()  # Long live the King!
+        self.active_player.passives.dispatch(Passives.TURN_START, self)
@@ -0,0 +1,69 @@
+class Journal(object):
+    # The undo log behind GameState.checkpoint() and undo(). Cards and zones call record(self) just before they
+    # change; the first time an object changes after a checkpoint its snapshot() is saved, and undo() restores the
+    # saved snapshots newest first. Everything else a move can change is small enough that GameState saves all of it
+    # with each checkpoint (the frame state).
+    __slots__ = ("_entries", "_frames", "_attached")
+
+    def __init__(self):
+        self._entries = []
+        self._frames = []  # (length of _entries at the checkpoint, ids recorded since, frame state)
+        self._attached = {}  # id -> every card and zone attach() pointed at this journal
+
+    def attach(self, obj):
+        obj.journal = self
+        self._attached[id(obj)] = obj
+
+    def detach_all(self):
+        # Stops everything ever attached recording here, including cards that have since left every zone, and drops
+        # the checkpoints
+        for obj in self._attached.values():
+            if obj.journal is self:
+                obj.journal = None
+        self._attached.clear()
+        self._entries.clear()
+        self._frames.clear()
+
+    def __len__(self):
+        return len(self._frames)
+
+    def checkpoint(self, frame_state):
+        self._frames.append((len(self._entries), set(), frame_state))
+        return len(self._frames) - 1
+
+    def record(self, obj):
+        if self._frames:
+            recorded = self._frames[-1][1]
+            if id(obj) not in recorded:
+                recorded.add(id(obj))
+                self._entries.append((obj, obj.snapshot()))
+
+    def release(self, checkpoint):
+        # Keeps everything as it is and forgets the checkpoint and every later one. Their snapshots are dropped, except
+        # an object's oldest one where the checkpoint before still needs it to undo.
+        if not 0 <= checkpoint < len(self._frames):
+            raise IndexError("no checkpoint {}".format(checkpoint))
+        start = self._frames[checkpoint][0]
+        del self._frames[checkpoint:]
+        if not self._frames:
+            del self._entries[start:]
+            return
+        recorded = self._frames[-1][1]
+        kept = []
+        for obj, snapshot in self._entries[start:]:
+            if id(obj) not in recorded:
+                recorded.add(id(obj))
+                kept.append((obj, snapshot))
+        self._entries[start:] = kept
+
+    def undo(self, checkpoint):
+        # Rolls back every object to how it was at the checkpoint, and returns the frame state saved with it
+        if not 0 <= checkpoint < len(self._frames):
+            raise IndexError("no checkpoint {}".format(checkpoint))
+        while True:
+            start, _, frame_state = self._frames.pop()
+            while len(self._entries) > start:
+                obj, snapshot = self._entries.pop()
+                obj.restore(snapshot)
+            if len(self._frames) == checkpoint:
+                return frame_state
@@ -0,0 +1,52 @@
+class PassiveRegistry(object):
+    # A player's cards in play that have passive abilities (Card.passives), by what they react to. Cards subscribe as
+    # they come into play and unsubscribe as they leave, so dispatch() is a single dict lookup - and does nothing -
+    # unless a card that reacts to that is actually in play.
+    __slots__ = ("_cards",)
+
+    def __init__(self):
+        self._cards = {}  # Passives -> tuple of subscribed cards, in the order they came into play
+
+    def __bool__(self):
+        return bool(self._cards)
+
+    def subscribe(self, card):
+        for passive in card.passives:
+            self._cards[passive] = self._cards.get(passive, ()) + (card,)
+
+    def unsubscribe(self, card):
+        for passive in card.passives:
+            cards = tuple(subscribed for subscribed in self._cards.get(passive, ()) if subscribed is not card)
+            if cards:
+                self._cards[passive] = cards
+            else:
+                self._cards.pop(passive, None)
+
+    def retain(self, zone):
+        # Unsubscribes every card that's no longer in zone
+        for cards in list(self._cards.values()):
+            for card in cards:
+                if card not in zone:
+                    self.unsubscribe(card)
+
+    def dispatch(self, passive, gamestate):
+        cards = self._cards.get(passive)
+        if cards:
+            for card in cards:
+                for effect in card.passives[passive]:
+                    effect.apply(gamestate)
+
+    def clear(self):
+        self._cards.clear()
+
+    def copy(self, card_copies):
+        registry = PassiveRegistry()
+        registry._cards = {passive: tuple(card_copies[card] for card in cards)
+                           for passive, cards in self._cards.items()}
+        return registry
+
+    def snapshot(self):
+        return dict(self._cards)
+
+    def restore(self, snapshot):
+        self._cards = dict(snapshot)
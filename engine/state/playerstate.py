@@ -1,88 +1,171 @@
-from random import shuffle
+from random import Random
 from collections import Counter
+from collections.abc import MutableMapping
 
-from components.cards import Scout, Viper
-from util.util import move_list_item
+from components.cards import Card, Scout, Viper
+from engine.state.passives import PassiveRegistry
+from engine.state.zone import BaseIndex, Zone
 from enums.enums import ValueTypes, Zones
 
 
+# The attribute each ValueTypes value is kept in: player.authority, player.trade and player.damage
+VALUE_ATTRIBUTES = {value_type: value_type.name.lower() for value_type in ValueTypes}
+
+
+class PlayerValues(MutableMapping):
+    # player.values: authority, trade and damage by ValueTypes, reading from and writing to the player's attributes
+    __slots__ = ("player",)
+
+    def __init__(self, player):
+        self.player = player
+
+    def __getitem__(self, key):
+        return getattr(self.player, VALUE_ATTRIBUTES[key])
+
+    def __setitem__(self, key, value):
+        setattr(self.player, VALUE_ATTRIBUTES[key], value)
+
+    def __delitem__(self, key):
+        raise TypeError("Player values can't be removed")
+
+    def __iter__(self):
+        return iter(VALUE_ATTRIBUTES)
+
+    def __len__(self):
+        return len(VALUE_ATTRIBUTES)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
 class PlayerState(object):
-    def __init__(self, name="Unnamed Player", first_player=False):
-        self.name = name
+    __slots__ = ("name", "rng", "authority", "trade", "damage", "zones", "deck", "hand", "in_play", "discard", "bases",
+                 "passives", "active_factions", "_starting_cards")
 
-        self.values = {
-            ValueTypes.AUTHORITY: 50,
-            ValueTypes.TRADE: 0,
-            ValueTypes.DAMAGE: 0
-        }
+    # first_card_id: card_ids for this player's starting cards count up from here
+    def __init__(self, name="Unnamed Player", first_player=False, rng=None, first_card_id=0):
+        self.name = name
+        self.rng = rng if rng is not None else Random()
 
-        deck = []
-        for _ in range(8):
-            deck.append(Scout(owner_id=name, location=Zones.DECK))
-        for _ in range(2):
-            deck.append(Viper(owner_id=name, location=Zones.DECK))
         self.zones = {
-            Zones.DECK: deck,
-            Zones.HAND: [],
-            Zones.IN_PLAY: [],
-            Zones.DISCARD: []
+            Zones.DECK: Zone(Zones.DECK),
+            Zones.HAND: Zone(Zones.HAND),
+            Zones.IN_PLAY: Zone(Zones.IN_PLAY),
+            Zones.DISCARD: Zone(Zones.DISCARD)
         }
-
+        self._bind_zones()
+        self.passives = PassiveRegistry()  # Engine code that moves cards into or out of play keeps this up to date
         self.active_factions = Counter()
 
-        shuffle(self.zones[Zones.DECK])
+        self._starting_cards = [card(owner_id=name, location=Zones.DECK, card_id=card_id)
+                                for card_id, card in enumerate([Scout] * 8 + [Viper] * 2, first_card_id)]
+        self.reset(first_player)
+
+    def reset(self, first_player=False):
+        # Back to a shuffled starting deck and opening hand, reusing the starting cards
+        self.authority = 50
+        self.trade = 0
+        self.damage = 0
+        self.active_factions.clear()
+        self.passives.clear()
+
+        for zone in self.zones.values():
+            zone.clear()
+        for card in self._starting_cards:
+            card.exhaust()
+            card.owner_id = self.name
+        self.deck.extend(self._starting_cards)
+
+        self.deck.shuffle(self.rng)
         self.draw(3 if first_player else 5)
 
+    def copy(self, rng, card_copies):
+        # For GameState.clone(): the same player with its own values, zones and (copied) cards
+        player = PlayerState.__new__(PlayerState)
+        player.name = self.name
+        player.rng = rng
+        player.authority = self.authority
+        player.trade = self.trade
+        player.damage = self.damage
+        player.zones = {key: zone.copy(card_copies) for key, zone in self.zones.items()}
+        player._bind_zones()
+        player.passives = self.passives.copy(card_copies)
+        player.active_factions = Counter(self.active_factions)
+        player._starting_cards = [card_copies[card] for card in self._starting_cards]
+        return player
+
+    def _bind_zones(self):
+        # The zones as attributes too: player.hand is the same Zone as player.zones[Zones.HAND], one lookup cheaper
+        self.deck = self.zones[Zones.DECK]
+        self.hand = self.zones[Zones.HAND]
+        self.in_play = self.zones[Zones.IN_PLAY]
+        self.discard = self.zones[Zones.DISCARD]
+        self.bases = BaseIndex(self.in_play)
+
+    @property
+    def values(self):
+        # player.values[ValueTypes.TRADE] = 5 sets player.trade
+        return PlayerValues(self)
+
+    def snapshot(self):
+        # No zones: GameState saves those along with everyone else's
+        return (self.authority, self.trade, self.damage), Counter(self.active_factions), self.passives.snapshot()
+
+    def restore(self, snapshot):
+        (self.authority, self.trade, self.damage), active_factions, passives = snapshot
+        self.passives.restore(passives)
+        self.active_factions.clear()
+        self.active_factions.update(active_factions)
+
     def __getitem__(self, key):
-        try:
-            return self.values[key]
-        except KeyError:
+        # player[ValueTypes.TRADE] or player[Zones.HAND]; the attributes (player.trade, player.hand) are quicker
+        attribute = VALUE_ATTRIBUTES.get(key)
+        if attribute is None:
             return self.zones[key]
+        return getattr(self, attribute)
 
     def __setitem__(self, key, value):
-        if key in self.values:
-            self.values[key] = value
+        if key in VALUE_ATTRIBUTES:
+            setattr(self, VALUE_ATTRIBUTES[key], value)
         elif key in self.zones:
-            self.zones[key] = value
+            cards = list(value)  # Before clearing: value may be this zone, or a generator over it
+            self.zones[key].clear()
+            self.zones[key].extend(cards)
         else:
             raise KeyError
 
     def shuffle_deck(self):
-        assert len(self[Zones.DECK]) == 0
-        for card in list(self[Zones.DISCARD]):
-            card.move_to(Zones.DECK)
-            move_list_item(card, self[Zones.DISCARD], self[Zones.DECK])
-        shuffle(self[Zones.DECK])
+        assert len(self.deck) == 0
+        self.discard.transfer(self.deck)
+        self.deck.shuffle(self.rng)
 
     def draw(self, n=5):
         for i in range(n):
             try:
-                card = self[Zones.DECK].pop()
+                card = self.deck.pop()
             except IndexError:
                 self.shuffle_deck()
-                card = self[Zones.DECK].pop()
+                card = self.deck.pop()
 
             card.move_to(Zones.HAND)
-            self[Zones.HAND].append(card)
+            self.hand.append(card)
 
     def start_turn(self):
-        for base in self[Zones.IN_PLAY]:
+        for base in self.in_play:
             base.ready()
 
     def end_turn(self):
-        self[ValueTypes.DAMAGE] = 0
-        self[ValueTypes.TRADE] = 0
+        self.damage = 0
+        self.trade = 0
         self.active_factions.clear()
 
-        ships = []
-        for card in self[Zones.IN_PLAY]:
-            if card.is_ship():
-                ships.append(card)
-            card.move_to(Zones.DISCARD)
-        for ship in ships:
-            move_list_item(ship, self[Zones.IN_PLAY], self[Zones.DISCARD])
+        self.in_play.transfer(self.discard, where=Card.is_ship)
+        if self.passives:
+            self.passives.retain(self.in_play)
+        for base in self.in_play:
+            base.exhaust()  # Readied again by start_turn
 
         try:
             self.draw(5)
         except IndexError:
-            assert len(self[Zones.DECK]) + len(self[Zones.DISCARD]) == 0
+            assert len(self.deck) + len(self.discard) == 0
@@ -0,0 +1,286 @@
+from collections.abc import Sequence
+from itertools import islice
+
+from enums.enums import CardTypes, Zones
+
+
+class Zone(Sequence):
+    # An ordered pile of cards that reads like the list it replaced: iteration goes bottom to top, so zone[-1] and
+    # pop() are the top of a deck, and zone[i] indexes by position. The cards are the keys of an insertion-ordered
+    # dict, which makes membership, remove() and pop() O(1). Indexes other than 0 and -1 are O(n), which is fine for
+    # the trade row and hands.
+    #
+    # A card added to a zone has its location set to that zone. Card.move_to still handles readying, exhausting and
+    # ownership, and must be called before the card is added.
+    #
+    # While a GameState is journaling (see GameState.checkpoint), journal is its Journal: every change records this
+    # zone, and the cards it moves, before making it.
+    #
+    # version goes up with every change (undoing one included), so caches of anything worked out from a zone's cards
+    # can tell when they're stale; see engine.legal_moves.
+    __slots__ = ("zone", "_cards", "journal", "version")
+
+    def __init__(self, zone, cards=()):
+        self.zone = zone
+        self._cards = {}
+        self.journal = None
+        self.version = 0
+        self.extend(cards)
+
+    def __len__(self):
+        return len(self._cards)
+
+    def __iter__(self):
+        return iter(self._cards)
+
+    def __reversed__(self):
+        return reversed(self._cards)
+
+    def __contains__(self, card):
+        return card in self._cards
+
+    def __getitem__(self, index):
+        if self._cards:
+            if index == -1:
+                return next(reversed(self._cards))
+            if index == 0:
+                return next(iter(self._cards))
+        return list(self._cards)[index]
+
+    def __eq__(self, other):
+        if isinstance(other, (Zone, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __repr__(self):
+        return "Zone({}, {})".format(self.zone.name, [card.name for card in self._cards])
+
+    def append(self, card):
+        if self.journal is not None:
+            self._record((card,))
+        self.version += 1
+        self._cards[card] = None
+        card.location = self.zone
+
+    def extend(self, cards):
+        if self.journal is not None:
+            cards = list(cards)
+            self._record(cards)
+        self.version += 1
+        zone = self.zone
+        for card in cards:
+            self._cards[card] = None
+            card.location = zone
+
+    def remove(self, card):
+        if self.journal is not None:
+            self.journal.record(self)
+        self.version += 1
+        try:
+            del self._cards[card]
+        except KeyError:
+            raise ValueError("{!r} is not in {}".format(card, self.zone.name)) from None
+
+    def pop(self, index=-1):
+        if self.journal is not None:
+            self.journal.record(self)
+        self.version += 1
+        if index == -1:
+            try:
+                return self._cards.popitem()[0]
+            except KeyError:
+                raise IndexError("pop from empty {}".format(self.zone.name)) from None
+        card = self[index]
+        del self._cards[card]
+        return card
+
+    def transfer(self, to_zone, cards=None, where=None):
+        # Moves cards onto the top of to_zone in one pass, keeping their order: the whole zone by default, else the
+        # given cards, else the cards where(card) is true. Like Card.move_to, cards are readied as they enter play
+        # and exhausted as they leave it.
+        if self.journal is not None:
+            self.journal.record(self)
+            cards = [card for card in self._cards if where is None or where(card)] if cards is None else list(cards)
+            to_zone._record(cards)
+        self.version += 1
+        to_zone.version += 1
+        if cards is not None:
+            moving = dict.fromkeys(cards)
+            for card in moving:
+                self.remove(card)
+        elif where is not None:
+            moving, kept = {}, {}
+            for card in self._cards:
+                if where(card):
+                    moving[card] = None
+                else:
+                    kept[card] = None
+            self._cards = kept
+        else:
+            moving, self._cards = self._cards, {}
+
+        if to_zone.zone == Zones.IN_PLAY:
+            for card in moving:
+                card.ready()
+        elif self.zone == Zones.IN_PLAY:
+            for card in moving:
+                card.exhaust()
+        zone = to_zone.zone
+        for card in moving:
+            card.location = zone
+        to_zone._cards.update(moving)
+
+    def clear(self):
+        if self.journal is not None:
+            self.journal.record(self)
+        self.version += 1
+        self._cards.clear()
+
+    def copy(self, card_copies):
+        # A Zone holding card_copies[card] for every card in this one, for GameState.clone()
+        zone = Zone(self.zone)
+        zone._cards = {card_copies[card]: None for card in self._cards}
+        return zone
+
+    def snapshot(self):
+        return tuple(self._cards)
+
+    def restore(self, snapshot):
+        # Only the order: restoring the cards' own state (locations included) is up to the caller
+        self._cards = dict.fromkeys(snapshot)
+        self.version += 1
+
+    def _record(self, cards):
+        # Journals this zone and the cards about to join it, which from now on journal their own changes
+        journal = self.journal
+        journal.record(self)
+        for card in cards:
+            journal.record(card)
+            journal.attach(card)
+
+    def count(self, card):
+        return 1 if card in self._cards else 0
+
+    def shuffle(self, rng):
+        # Draws from rng exactly as rng.shuffle(list(zone)) would
+        if self.journal is not None:
+            self.journal.record(self)
+        self.version += 1
+        cards = list(self._cards)
+        rng.shuffle(cards)
+        self._cards = dict.fromkeys(cards)
+
+
+class BaseIndex(object):
+    # A player's bases in play (PlayerState.bases): all of them and the outposts, in play order, with their total
+    # defense. Every way a base enters or leaves play - playing, attacking, destroying, scrapping, undoing - goes
+    # through the IN_PLAY Zone, so the index is rebuilt from it on the first question after its version changes, and
+    # answers straight from the last build until then.
+    __slots__ = ("_zone", "_version", "_bases", "_outposts", "_defense", "_outpost_defense")
+
+    def __init__(self, zone):
+        self._zone = zone
+        self._version = None
+
+    def _refresh(self):
+        if self._version != self._zone.version:
+            self._bases = tuple(card for card in self._zone if card.card_type != CardTypes.SHIP)
+            self._outposts = tuple(card for card in self._bases if card.card_type == CardTypes.OUTPOST)
+            self._defense = sum(card.defense for card in self._bases)
+            self._outpost_defense = sum(card.defense for card in self._outposts)
+            self._version = self._zone.version
+
+    @property
+    def bases(self):
+        self._refresh()
+        return self._bases
+
+    @property
+    def outposts(self):
+        self._refresh()
+        return self._outposts
+
+    @property
+    def defense(self):
+        self._refresh()
+        return self._defense
+
+    @property
+    def outpost_defense(self):
+        self._refresh()
+        return self._outpost_defense
+
+
+class TradeDeck(Sequence):
+    # The trade deck: a shuffled list of cards and a cursor. Cards before the cursor have been dealt, so dealing is a
+    # cursor advance rather than deleting from the front of a list. It reads as a list of the undealt cards with the
+    # next card to deal first; there's no way to add or remove cards except by dealing them.
+    __slots__ = ("_cards", "_cursor")
+
+    def __init__(self):
+        self._cards = []
+        self._cursor = 0
+
+    def reset(self, cards, rng):
+        # Draws from rng exactly as rng.shuffle(list(cards)) would
+        self._cards[:] = cards
+        rng.shuffle(self._cards)
+        self._cursor = 0
+
+    def deal(self, n):
+        # Up to n cards off the top (fewer if the deck runs out)
+        cards = self._cards[self._cursor:self._cursor + n]
+        self._cursor += len(cards)
+        return cards
+
+    def clear(self):
+        # Deals out everything at once, for setting up an exhausted trade deck
+        self._cursor = len(self._cards)
+
+    def copy(self, card_copies):
+        trade_deck = TradeDeck()
+        trade_deck._cards = [card_copies[card] for card in self._cards]
+        trade_deck._cursor = self._cursor
+        return trade_deck
+
+    def snapshot(self):
+        # Only reset() reorders the cards, so the cursor is all there is
+        return self._cursor
+
+    def restore(self, snapshot):
+        self._cursor = snapshot
+
+    def __len__(self):
+        return len(self._cards) - self._cursor
+
+    def __iter__(self):
+        return islice(self._cards, self._cursor, None)
+
+    def __getitem__(self, index):
+        # Relative to the cursor, without copying the undealt cards first
+        if isinstance(index, slice):
+            return [self._cards[self._cursor + i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("trade deck index out of range")
+        return self._cards[self._cursor + index]
+
+    def __contains__(self, card):
+        try:
+            self._cards.index(card, self._cursor)
+        except ValueError:
+            return False
+        return True
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __repr__(self):
+        return "TradeDeck({})".format([card.name for card in self])
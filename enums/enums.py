@@ -20,6 +20,12 @@ class Triggers(Enum):
     SCRAP = "SCRAP"
 
 
+class Passives(Enum):
+    # Things that happen which cards in play can react to without being activated; see Card.passives
+    SHIP_PLAYED = "SHIP_PLAYED"
+    TURN_START = "TURN_START"
+
+
 class Zones(Enum):
     DECK = "DECK"
     HAND = "HAND"
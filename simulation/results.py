@@ -0,0 +1,69 @@
+from collections import Counter
+from math import log, sqrt
+from pprint import PrettyPrinter
+from statistics import NormalDist
+
+
+class BattleResults(object):
+    # Running tally of a two-player matchup, updated as each game finishes rather than from a list of every result.
+    # Besides wins and victory turn histograms, it tracks a Wilson score interval on player 1's win rate and a
+    # sequential probability ratio test (SPRT) of "player 1 wins 50% - margin" against "player 1 wins 50% + margin".
+    # Games can't be drawn, so every game counts toward the win rate.
+    def __init__(self, player_1, player_2, confidence=0.95, sprt_margin=None, sprt_error_rate=0.05):
+        self.player_1 = player_1
+        self.player_2 = player_2
+        self.games = 0
+        self.wins = Counter()
+        self.victory_turn_numbers = {player_1: Counter(), player_2: Counter()}
+
+        self.z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+        self.sprt_margin = sprt_margin
+        self.sprt_bound = log((1 - sprt_error_rate) / sprt_error_rate)
+        self.sprt_llr = 0.0
+        if sprt_margin:
+            self._sprt_step = log((0.5 + sprt_margin) / (0.5 - sprt_margin))
+        else:
+            self._sprt_step = 0.0
+
+    def add(self, victor, turn_number, count=1):
+        self.games += count
+        self.wins[victor] += count
+        self.victory_turn_numbers[victor][turn_number] += count
+        self.sprt_llr += count * self._sprt_step if victor == self.player_1 else -count * self._sprt_step
+
+    def update(self, results):
+        # results is a Counter of (victor, turn_number), as returned by starstuff.play_games
+        for (victor, turn_number), count in results.items():
+            self.add(victor, turn_number, count)
+
+    def win_rate(self):
+        return self.wins[self.player_1] / self.games if self.games else 0.5
+
+    def confidence_interval(self):
+        if not self.games:
+            return 0.0, 1.0
+        n, p, z = self.games, self.win_rate(), self.z
+        centre = (p + z * z / (2 * n)) / (1 + z * z / n)
+        half_width = z * sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+        return max(0.0, centre - half_width), min(1.0, centre + half_width)
+
+    def sprt_decision(self):
+        if not self.sprt_margin:
+            return None
+        if self.sprt_llr >= self.sprt_bound:
+            return self.player_1
+        if self.sprt_llr <= -self.sprt_bound:
+            return self.player_2
+        return None
+
+    def is_settled(self, until_ci):
+        low, high = self.confidence_interval()
+        return (high - low) / 2 <= until_ci or self.sprt_decision() is not None
+
+    def report(self):
+        print("Player 1 Wins: {}\nPlayer 2 Wins: {}".format(self.wins[self.player_1], self.wins[self.player_2]))
+        print("Player 1 Victory Turn Numbers:")
+        PrettyPrinter().pprint(sorted(self.victory_turn_numbers[self.player_1].items()))
+        print("Player 2 Victory Turn Numbers:")
+        PrettyPrinter().pprint(sorted(self.victory_turn_numbers[self.player_2].items()))
@@ -0,0 +1,165 @@
+import random
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from enum import Enum
+from functools import partial
+from itertools import permutations
+from time import perf_counter
+
+from engine.state.gamestate import GameState
+from starstuff import play_game
+from util.util import derive_seed, derive_seeds
+
+
+def play_pairing(factory_1, factory_2, seeds):
+    # Runs in a worker process. Returns how many games the first seat won, and how long the batch took.
+    strategy_1, strategy_2 = factory_1(), factory_2()
+    gamestate = GameState("Alice", "Bob")
+    start = perf_counter()
+    seat_1_wins = 0
+    for seed in seeds:
+        victor, _ = play_game(seed, strategy_1, strategy_2, gamestate=gamestate)
+        if victor == "Alice":
+            seat_1_wins += 1
+    return seat_1_wins, perf_counter() - start
+
+
+def describe_factory(factory):
+    # FactionStrategy -> "FactionStrategy"; partial(FactionStrategy, Factions.BLOB) -> "FactionStrategy(BLOB)"
+    if isinstance(factory, partial):
+        args = [_describe_arg(a) for a in factory.args]
+        args += ["{}={}".format(k, _describe_arg(v)) for k, v in factory.keywords.items()]
+        return "{}({})".format(describe_factory(factory.func), ", ".join(args))
+    return getattr(factory, "__name__", repr(factory))
+
+
+def _describe_arg(arg):
+    return arg.name if isinstance(arg, Enum) else repr(arg)
+
+
+class Pairing(object):
+    # One seat order of one matchup: strategy seat_1 moves first against strategy seat_2
+    def __init__(self, seat_1, seat_2, seeds):
+        self.seat_1 = seat_1
+        self.seat_2 = seat_2
+        self.seeds = seeds
+        self.scheduled = 0
+        self.games_played = 0
+        self.seconds = 0.0
+
+    def remaining(self):
+        return len(self.seeds) - self.scheduled
+
+    def seconds_per_game(self, default):
+        return self.seconds / self.games_played if self.games_played else default
+
+    def schedule(self, n):
+        seeds = self.seeds[self.scheduled:self.scheduled + n]
+        self.scheduled += len(seeds)
+        return seeds
+
+
+class Tournament(object):
+    # Round robin over strategy factories (zero-argument callables returning a Strategy - classes, or partials for
+    # configured strategies). Every pair plays games_per_pairing games in each seat order.
+    #
+    # Work is handed out in batches sized from each pairing's measured seconds per game, so every task takes about
+    # task_seconds, and the pairing with the most estimated work left goes first. Each pairing starts with a small
+    # probe batch to get a measurement. Games are seeded per pairing, so results don't depend on the scheduling.
+    def __init__(self, factories, games_per_pairing=100, names=None, seed=None, workers=1,
+                 task_seconds=0.5, probe_games=2):
+        self.factories = list(factories)
+        self.names = list(names) if names else [describe_factory(f) for f in self.factories]
+        self.workers = workers
+        self.task_seconds = task_seconds
+        self.probe_games = probe_games
+
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.pairings = [Pairing(i, j, derive_seeds(derive_seed(seed, k), games_per_pairing))
+                         for k, (i, j) in enumerate(permutations(range(len(self.factories)), 2))]
+
+        n = len(self.factories)
+        self.wins = [[0] * n for _ in range(n)]
+        self.games = [[0] * n for _ in range(n)]
+
+    def run(self, on_update=None):
+        # on_update(tournament) is called after every finished batch, so matrix and rankings can be watched live
+        if self.workers > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                in_flight = {}
+                while True:
+                    while len(in_flight) < self.workers * 2:
+                        task = self._next_task()
+                        if task is None:
+                            break
+                        pairing, seeds = task
+                        future = executor.submit(play_pairing,
+                                                 self.factories[pairing.seat_1], self.factories[pairing.seat_2], seeds)
+                        in_flight[future] = (pairing, len(seeds))
+                    if not in_flight:
+                        break
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pairing, n = in_flight.pop(future)
+                        self._record(pairing, n, *future.result())
+                        if on_update:
+                            on_update(self)
+        else:
+            while True:
+                task = self._next_task()
+                if task is None:
+                    break
+                pairing, seeds = task
+                result = play_pairing(self.factories[pairing.seat_1], self.factories[pairing.seat_2], seeds)
+                self._record(pairing, len(seeds), *result)
+                if on_update:
+                    on_update(self)
+        return self
+
+    def _next_task(self):
+        pending = [p for p in self.pairings if p.remaining()]
+        if not pending:
+            return None
+
+        unprobed = [p for p in pending if not p.scheduled]
+        if unprobed:
+            return unprobed[0], unprobed[0].schedule(self.probe_games)
+
+        measured = [p for p in self.pairings if p.games_played]
+        default = sum(p.seconds for p in measured) / sum(p.games_played for p in measured) if measured else 0.01
+
+        pairing = max(pending, key=lambda p: p.remaining() * p.seconds_per_game(default))
+        batch_size = max(1, int(self.task_seconds / max(pairing.seconds_per_game(default), 1e-6)))
+        return pairing, pairing.schedule(batch_size)
+
+    def _record(self, pairing, n, seat_1_wins, seconds):
+        pairing.games_played += n
+        pairing.seconds += seconds
+
+        i, j = pairing.seat_1, pairing.seat_2
+        self.wins[i][j] += seat_1_wins
+        self.wins[j][i] += n - seat_1_wins
+        self.games[i][j] += n
+        self.games[j][i] += n
+
+    def win_rate_matrix(self):
+        # [i][j] is how often strategy i beat strategy j, across both seat orders; None until they've played
+        return [[self.wins[i][j] / self.games[i][j] if self.games[i][j] else None
+                 for j in range(len(self.factories))]
+                for i in range(len(self.factories))]
+
+    def rankings(self):
+        standings = []
+        for i, name in enumerate(self.names):
+            games = sum(self.games[i])
+            standings.append((name, sum(self.wins[i]) / games if games else 0.0, games))
+        return sorted(standings, key=lambda standing: standing[1], reverse=True)
+
+    def report(self):
+        width = max(len(name) for name in self.names)
+        for name, row in zip(self.names, self.win_rate_matrix()):
+            print("{:<{}}  {}".format(name, width, "  ".join(" --- " if r is None else "{:.3f}".format(r)
+                                                            for r in row)))
+        print()
+        for rank, (name, win_rate, games) in enumerate(self.rankings(), 1):
+            print("{:>2}. {:<{}}  {:.3f} ({} games)".format(rank, name, width, win_rate, games))
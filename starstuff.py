@@ -1,12 +1,16 @@
+import random
 from collections import Counter
-from pprint import PrettyPrinter
+from concurrent.futures import ProcessPoolExecutor
 
 from enums.enums import Factions
 from engine.state.gamestate import GameState
+from simulation.results import BattleResults
 from strategies.faction_strategy import FactionStrategy
+from util.util import derive_seeds
 
 
-def play_game():
+def play_game(seed=None, strategy_1=None, strategy_2=None, sinks=None, gamestate=None):
+    # Pass the GameState("Alice", "Bob") of an earlier game as gamestate to reset and reuse it instead of building one
     # carter_strategy = ExplorerStrategy(max_exp=25,
     #                                    min_exp=6,
     #                                    ratio=2)
@@ -15,10 +19,14 @@ def play_game():
     player_2 = "Bob"
 
     strategies = {
-        player_1: FactionStrategy(Factions.STAR_EMPIRE),
-        player_2: FactionStrategy(Factions.MACHINE_CULT)}
+        player_1: strategy_1 if strategy_1 is not None else FactionStrategy(Factions.STAR_EMPIRE),
+        player_2: strategy_2 if strategy_2 is not None else FactionStrategy(Factions.MACHINE_CULT)}
 
-    gamestate = GameState(player_1, player_2)
+    if gamestate is None:
+        gamestate = GameState(player_1, player_2, seed=seed, sinks=sinks)
+    else:
+        gamestate.sinks = list(sinks) if sinks else []
+        gamestate.reset(seed)
     while True:
         moves = strategies[gamestate.active_player.name].get_moves(gamestate)
         for move in moves:
@@ -29,11 +37,44 @@ def play_game():
                 return gamestate.victor, gamestate.turn_number
 
 
-def battle(n=1):
-    results = [play_game() for _ in range(n)]
-    print("Player 1 Wins: {}\nPlayer 2 Wins: {}".format(len([r for r in results if r[0] == "Alice"]),
-                                                        len([r for r in results if r[0] == "Bob"])))
-    print("Player 1 Victory Turn Numbers:")
-    PrettyPrinter().pprint(sorted(Counter([result[1] for result in results if result[0] == "Alice"]).items()))
-    print("Player 2 Victory Turn Numbers:")
-    PrettyPrinter().pprint(sorted(Counter([result[1] for result in results if result[0] == "Bob"]).items()))
+def play_games(seeds, gamestate=None):
+    # Runs in a worker process. Each game has its own seed, so results don't depend on how games were chunked.
+    # All of the chunk's games are played on one reused GameState.
+    if gamestate is None:
+        gamestate = GameState("Alice", "Bob")
+    return Counter(play_game(seed, gamestate=gamestate) for seed in seeds)
+
+
+def battle(n=1, workers=1, chunksize=None, seed=None, until_ci=None):
+    # With until_ci, n is only an upper bound: battle stops as soon as the 95% interval on player 1's win rate is
+    # within +/- until_ci, or a sequential test decides which player is better by more than until_ci.
+    if seed is None:
+        seed = random.getrandbits(64)
+    seeds = derive_seeds(seed, n)
+    results = BattleResults("Alice", "Bob", sprt_margin=until_ci)
+
+    if workers > 1:
+        if chunksize is None:
+            chunksize = max(1, n // (workers * 4))
+        chunks = [seeds[start:start + chunksize] for start in range(0, n, chunksize)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(play_games, chunk) for chunk in chunks]
+            # In submission order, not as they finish, so where an early stop falls only depends on the seed
+            for future in futures:
+                results.update(future.result())
+                if until_ci and results.is_settled(until_ci):
+                    for unfinished in futures:
+                        unfinished.cancel()
+                    break
+    else:
+        gamestate = GameState("Alice", "Bob")
+        for game_seed in seeds:
+            results.add(*play_game(game_seed, gamestate=gamestate))
+            if until_ci and results.is_settled(until_ci):
+                break
+
+    results.report()
+    if until_ci:
+        print("Player 1 Win Rate: {:.4f} ({:.4f} - {:.4f}) after {} games".format(
+            results.win_rate(), *results.confidence_interval(), results.games))
+    return results
@@ -1,6 +1,5 @@
 from components.cards import Explorer
 from engine.move import AcquireCard
-from enums.enums import Zones, ValueTypes
 from strategies.strategies import Strategy
 
 
@@ -18,29 +17,38 @@ class ExplorerStrategy(Strategy):
     def get_moves(self, gamestate):
         playerstate = gamestate.active_player
 
+        pending_moves = self._get_resolve_pending_effect_moves(gamestate)
+        if pending_moves:
+            return pending_moves
+
         # If we have cards, play them
-        if playerstate[Zones.HAND]:
+        if playerstate.hand:
             return self._get_play_all_cards_moves(gamestate)
 
         # If we don't have cards, buy some explorers?
         owned_explorers = sum([zone.count(Explorer) for zone in playerstate.zones.values()])
         if self.maximum_explorers and owned_explorers < self.maximum_explorers:
-            number_to_buy = playerstate[ValueTypes.TRADE] // Explorer.cost
+            number_to_buy = playerstate.trade // Explorer.cost
             if number_to_buy:
                 return [AcquireCard(Explorer)] * number_to_buy
 
         # If we aren't buying, scrap?
         if owned_explorers:
-            ratio = gamestate.opponent.values[ValueTypes.AUTHORITY] / owned_explorers
+            ratio = gamestate.opponent.authority / owned_explorers
             if owned_explorers >= self.minimum_explorers\
                     or ratio < self.authority_to_explorer_ratio_to_ignore_minimum:
-                number_to_scrap = playerstate[Zones.IN_PLAY].count(Explorer)
+                number_to_scrap = playerstate.in_play.count(Explorer)
                 if number_to_scrap:
                     # TODO: target individual Explorers for ScrapAbility
                     return [] * number_to_scrap
 
-        # If we're not scrapping, attack?
-        if playerstate[ValueTypes.DAMAGE]:
+        # If we're not scrapping, attack? (Outposts have to go first)
+        if playerstate.damage > 0:
+            outposts = self._get_attack_all_outposts_moves(gamestate)
+            if outposts:
+                # Only an outpost this damage can destroy; one left standing still protects the opponent
+                return [move for move in outposts if move.base.defense <= playerstate.damage][:1] or \
+                    self._get_end_turn_move()
             return self._get_attack_move(gamestate)
 
         # Guess we're done then
@@ -1,8 +1,6 @@
-from random import sample, randint
-
 from engine.effects import PendDiscard, PendScrap, PendDestroyBase
 from engine.move import Discard, Scrap, DestroyBase, AttackBase, AttackOpponent
-from enums.enums import Factions, Zones, Triggers, ValueTypes
+from enums.enums import Factions, Triggers
 from strategies.strategies import Strategy
 
 
@@ -15,31 +13,35 @@ class FactionStrategy(Strategy):
         first_pending_effect = gamestate.pending_effects[0] if gamestate.pending_effects else None
         if isinstance(first_pending_effect, PendDiscard):
             if first_pending_effect.mandatory:
-                if first_pending_effect.up_to >= len(gamestate[Zones.HAND]):
-                    return [Discard(*gamestate[Zones.HAND])]
-                return [Discard(*sample(gamestate[Zones.HAND], first_pending_effect.up_to))]
-            number_to_discard = randint(0, first_pending_effect.up_to)
-            if number_to_discard >= len(gamestate[Zones.HAND]):
-                return [Discard(*gamestate[Zones.HAND])]
-            return [Discard(*sample(gamestate[Zones.HAND], number_to_discard))]
+                if first_pending_effect.up_to >= len(gamestate.active_player.hand):
+                    return [Discard(*gamestate.active_player.hand)]
+                return [Discard(*gamestate.rng.sample(gamestate.active_player.hand, first_pending_effect.up_to))]
+            number_to_discard = gamestate.rng.randint(0, first_pending_effect.up_to)
+            if number_to_discard >= len(gamestate.active_player.hand):
+                return [Discard(*gamestate.active_player.hand)]
+            return [Discard(*gamestate.rng.sample(gamestate.active_player.hand, number_to_discard))]
 
         playerstate = gamestate.active_player
 
         # If we have to Scrap (because of Machine Base), do it
         if isinstance(first_pending_effect, PendScrap) and first_pending_effect.mandatory:
-            if gamestate.active_player[Zones.HAND]:
-                return [Scrap(gamestate.active_player[Zones.HAND][0])]
+            if gamestate.active_player.hand:
+                return [Scrap(gamestate.active_player.hand[0])]
 
         if isinstance(first_pending_effect, PendDestroyBase):
             return [DestroyBase(self._get_target_base(gamestate))]
 
+        pending_moves = self._get_resolve_pending_effect_moves(gamestate)
+        if pending_moves:
+            return pending_moves
+
         # If we have bases, activate them
-        for card in playerstate[Zones.IN_PLAY]:
-            if card.is_base() and Triggers.BASE in card.available_abilities:
+        for card in playerstate.bases.bases:
+            if card.can_trigger(Triggers.BASE):
                 return self._get_activate_base_move(gamestate, card)
 
         # If we have any ships with scrap abilities, play them
-        scrap_ships = [card for card in playerstate[Zones.HAND]
+        scrap_ships = [card for card in playerstate.hand
                        if card.has_ability(PendScrap, triggers=[Triggers.SHIP])]
         if scrap_ships:
             x = [e for e in scrap_ships[0].abilities[Triggers.SHIP]]
@@ -49,7 +51,7 @@ class FactionStrategy(Strategy):
                                                     if isinstance(e, PendScrap)][0])
 
         # If we have cards, play them
-        if playerstate[Zones.HAND]:
+        if playerstate.hand:
             return self._get_play_all_cards_moves(gamestate)
 
         # If we have ally abilities available, activate them
@@ -58,13 +60,17 @@ class FactionStrategy(Strategy):
             return ally_moves
 
         # If we can afford a card, buy it, starting with the most expensive
-        if playerstate[ValueTypes.TRADE] > 0:
+        if playerstate.trade > 0:
             move = self._get_buy_most_expensive_card_move(gamestate, self.faction)
+            if move is None and self._is_walled_off(gamestate):
+                # Walled off by an outpost we can't break: buy outside the faction, or an Explorer, rather than
+                # stall the game forever
+                move = self._get_buy_most_expensive_card_move(gamestate) or self._get_buy_explorer_move(gamestate)
             if move is not None:
                 return move
 
         # If we can't buy, see if we can just win
-        current_damage = playerstate[ValueTypes.DAMAGE]
+        current_damage = playerstate.damage
         damage_to_win = self._get_damage_required_to_win(gamestate)
         if current_damage >= damage_to_win:
             return self._get_attack_all_outposts_moves(gamestate) + self._get_attack_move(gamestate)
@@ -78,12 +84,14 @@ class FactionStrategy(Strategy):
             # noinspection PyTypeChecker
             return scrap_moves + outpost_moves + deathblow_move
 
-        # If we can't win and there's an outpost, destroy it; or destroy a base; or attack the opponent
+        # If we can't win and there's an outpost we can destroy, destroy it; or destroy a base; or attack the opponent
         if current_damage > 0:
-            base_to_hit = self._get_target_base(gamestate)
-            if base_to_hit:
-                return [AttackBase(base_to_hit)]
-            return [AttackOpponent(gamestate.opponent)]
+            bases = gamestate.opponent.bases
+            for base in bases.outposts or bases.bases:
+                if base.defense <= current_damage:
+                    return [AttackBase(base)]
+            if not bases.outposts:
+                return [AttackOpponent(gamestate.opponent)]
 
         # If we can't Attack, End Turn
         return self._get_end_turn_move()
\ No newline at end of file
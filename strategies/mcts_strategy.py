@@ -0,0 +1,216 @@
+import math
+from copy import copy
+from concurrent.futures import ProcessPoolExecutor
+from random import Random
+from time import perf_counter
+
+from components.cards import Card
+from engine.state.playerstate import PlayerState
+from strategies.strategies import Strategy
+from util.util import derive_seed, slot_items
+
+
+class MCTSStrategy(Strategy):
+    # Picks one move per get_moves call by Monte Carlo Tree Search over a clone of the game.
+    #
+    # node_budget: search iterations per decision; time_budget: seconds per decision. Search stops at whichever runs
+    #   out first, so give at least one. Only a node budget keeps games reproducible from their seed.
+    # rollout_strategy: a Strategy that plays both sides of each rollout; None plays uniformly random legal moves
+    # rollout_turns: how many turn ends a rollout plays before scoring the position with evaluate(); None plays on
+    #   to the end of the game (random rollouts can take a long time to get there)
+    # exploration: the UCB1 exploration constant
+    # workers: root-parallel search: each worker process searches its own tree for the whole budget, and the root
+    #   visit counts are summed. Call close(), or use the strategy as a context manager, to shut the workers down;
+    #   otherwise they go when the strategy is garbage collected.
+    #
+    # Each iteration plays down the tree and out through a rollout on the one clone, then undoes back to the root
+    # with GameState.checkpoint()/undo(). It also redraws what the player to move can't know first (their own deck
+    # order, the opponent's hand and deck), so the search doesn't play to hidden cards; the tree's statistics are
+    # shared across those redraws, only counting a move as available when it's legal (single-observer ISMCTS). The
+    # trade deck order is left as it is.
+    def __init__(self, node_budget=200, time_budget=None, rollout_strategy=None, rollout_turns=1, exploration=0.7,
+                 workers=1):
+        if node_budget is None and time_budget is None:
+            raise ValueError("MCTSStrategy needs a node_budget or a time_budget")
+        self.node_budget = node_budget
+        self.time_budget = time_budget
+        self.rollout_strategy = rollout_strategy
+        self.rollout_turns = rollout_turns
+        self.exploration = exploration
+        self.workers = workers
+        self._executor = None
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_executor"] = None
+        return state
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        if getattr(self, "_executor", None) is not None:  # Not set if __init__ raised
+            self._executor.shutdown(wait=False)
+
+    def get_moves(self, gamestate):
+        moves = {move_key(move): move for move in gamestate.legal_moves()}
+        if len(moves) == 1:
+            return list(moves.values())
+
+        # Drawn from the game's RNG so that, with a node budget, a seed still replays the whole game
+        seed = gamestate.rng.getrandbits(64)
+        search = gamestate.clone()
+        # The clone shares its pending effect instances with the game, so point them at the clone for the search and
+        # back at whatever they pointed at before when it's done
+        owners = [(effect, effect.gamestate) for effect in gamestate.pending_effects]
+        for effect in search.pending_effects:
+            effect.gamestate = search
+        try:
+            visits = self._search_visits(search, seed)
+        finally:
+            for effect, owner in owners:
+                effect.gamestate = owner
+
+        # Ties (and keys the search never reached) go to the move listed first
+        best = max(moves, key=lambda key: visits.get(key, 0))
+        return [moves[best]]
+
+    def _search_visits(self, search, seed):
+        # Root visit counts from this process, or summed over the worker processes
+        if self.workers > 1:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            worker = copy(self)
+            worker.workers = 1
+            futures = [self._executor.submit(worker.search, search, derive_seed(seed, index))
+                       for index in range(self.workers)]
+            visits = {}
+            for future in futures:
+                for key, count in future.result().items():
+                    visits[key] = visits.get(key, 0) + count
+            return visits
+        return self.search(search, seed)
+
+    def search(self, gamestate, seed):
+        # Searches from gamestate (which it plays on and undoes, so pass a clone) and returns the visit count of each
+        # root move by move_key
+        rng = Random(seed)
+        root = _Node(None)
+        player = gamestate.active_player.name
+        start = perf_counter()
+        iterations = 0
+        while (self.node_budget is None or iterations < self.node_budget) and \
+                (self.time_budget is None or perf_counter() - start < self.time_budget):
+            checkpoint = gamestate.checkpoint()
+            gamestate.rng.seed(rng.getrandbits(64))
+            _redraw_hidden_cards(gamestate)
+
+            path = self._select_and_expand(gamestate, root, rng)
+            reward = self._rollout(gamestate, player)
+            for node in path:
+                node.visits += 1
+                node.wins += reward if node.mover == player else 1 - reward
+
+            gamestate.undo(checkpoint)
+            iterations += 1
+        gamestate.stop_journal()
+        return {key: child.visits for key, child in root.children.items()}
+
+    def evaluate(self, gamestate, player):
+        # How good the position is for player, from 0 (lost) to 1 (won): authority plus what's been spent on decks
+        if gamestate.victor is not None:
+            return 1.0 if gamestate.victor == player else 0.0
+        me = gamestate.players[player]
+        them = gamestate.opponent if me is gamestate.active_player else gamestate.active_player
+        lead = me.authority - them.authority + _deck_value(me) - _deck_value(them)
+        return 0.5 + 0.5 * math.tanh(lead / 20)
+
+    def _select_and_expand(self, gamestate, node, rng):
+        # Follows UCB1 down the tree to the first untried move, plays it, and returns the nodes passed through
+        path = []
+        while gamestate.victor is None:
+            moves = {move_key(move): move for move in gamestate.legal_moves()}
+            untried = []
+            for key in moves:
+                if key in node.children:
+                    node.children[key].available += 1
+                else:
+                    untried.append(key)
+            if untried:
+                key = rng.choice(untried)
+                child = node.children[key] = _Node(gamestate.active_player.name)
+            else:
+                key = max(moves, key=lambda key: node.children[key].score(self.exploration))
+                child = node.children[key]
+            moves[key].execute(gamestate)
+            path.append(child)
+            node = child
+            if untried:
+                break
+        return path
+
+    def _rollout(self, gamestate, player):
+        last_turn = gamestate.turn_number + self.rollout_turns if self.rollout_turns is not None else None
+        while gamestate.victor is None and (last_turn is None or gamestate.turn_number < last_turn):
+            if self.rollout_strategy is not None:
+                for move in self.rollout_strategy.get_moves(gamestate):
+                    move.execute(gamestate)
+                    if gamestate.victor:
+                        break
+            else:
+                gamestate.rng.choice(gamestate.legal_moves()).execute(gamestate)
+        return self.evaluate(gamestate, player)
+
+
+class _Node(object):
+    __slots__ = ("mover", "children", "visits", "wins", "available")
+
+    def __init__(self, mover):
+        self.mover = mover  # The player who made the move leading here, whose point of view wins are counted from
+        self.children = {}
+        self.visits = 0
+        self.wins = 0.0
+        self.available = 1  # How many times this move was legal when its parent was selected from
+
+    def score(self, exploration):
+        return self.wins / self.visits + exploration * math.sqrt(math.log(self.available) / self.visits)
+
+
+def _deck_value(player):
+    return sum(card.cost or 0 for zone in player.zones.values() for card in zone)
+
+
+def _redraw_hidden_cards(gamestate):
+    active_player, opponent = gamestate.active_player, gamestate.opponent
+    active_player.deck.shuffle(gamestate.rng)
+
+    hand_size = len(opponent.hand)
+    opponent.hand.transfer(opponent.deck)
+    opponent.deck.shuffle(gamestate.rng)
+    opponent.draw(hand_size)
+
+
+def move_key(move):
+    # Identifies a move by what it does rather than by object, so the same move matches across clones and processes
+    return (type(move).__name__,) + tuple(_key(value) for name, value in sorted(slot_items(move))
+                                          if name != "effect")
+
+
+def _key(value):
+    if isinstance(value, Card):
+        return value.card_id if value.card_id is not None else value.name
+    if isinstance(value, PlayerState):
+        return value.name
+    if isinstance(value, type):
+        return value.__name__
+    if isinstance(value, tuple):
+        return tuple(_key(item) for item in value)
+    return value
@@ -1,4 +1,3 @@
-from enums.enums import Zones, ValueTypes
 from strategies.strategies import Strategy
 
 
@@ -6,18 +5,31 @@ class SplurgeStrategy(Strategy):
     def get_moves(self, gamestate):
         playerstate = gamestate.active_player
 
+        pending_moves = self._get_resolve_pending_effect_moves(gamestate)
+        if pending_moves:
+            return pending_moves
+
         # If we have cards, play them
-        if playerstate[Zones.HAND]:
+        if playerstate.hand:
             return self._get_play_all_cards_moves(gamestate)
 
         # If we can afford a card, buy it, starting with the most expensive
-        if playerstate[ValueTypes.TRADE] > 0:
+        if playerstate.trade > 0:
             move = self._get_buy_most_expensive_card_move(gamestate)
+            if move is None and self._is_walled_off(gamestate):
+                # Walled off with nothing in the trade row affordable: an Explorer at least adds trade, where ending the
+                # turn could leave both players stuck forever
+                move = self._get_buy_explorer_move(gamestate)
             if move is not None:
                 return move
 
-        # If we can't buy, Attack!
-        if playerstate[ValueTypes.DAMAGE] > 0:
+        # If we can't buy, Attack! (Outposts have to go first)
+        if playerstate.damage > 0:
+            outposts = self._get_attack_all_outposts_moves(gamestate)
+            if outposts:
+                # Only an outpost this damage can destroy; one left standing still protects the opponent
+                return [move for move in outposts if move.base.defense <= playerstate.damage][:1] or \
+                    self._get_end_turn_move()
             return self._get_attack_move(gamestate)
 
         # If we can't Attack, End Turn
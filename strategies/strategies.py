@@ -1,23 +1,23 @@
-from random import choice
-from components.cards import Viper, Scout, MachineBase
-from engine.effects import PendScrap, PendChoice, PendRecycle, GainDamage
+from components.cards import Viper, Scout, Explorer, MachineBase, StealthNeedle
+from engine.effects import PendScrap, PendChoice, PendRecycle, PendDiscard, PendDestroyBase, \
+    PendCopyShip, PendAcquireShipToTopForFree
 from enums.enums import Triggers, CardTypes, ValueTypes, Zones
 from engine.move import PlayCard, ActivateBase, ActivateAlly, ActivateScrap, AcquireCard, EndTurn, Choose, Scrap, \
-    AttackBase, AttackOpponent
+    AttackBase, AttackOpponent, Discard, DestroyBase, CopyShip, AcquireShipToTopForFree
 
 
 class Strategy(object):
     @classmethod
     def _get_play_all_cards_moves(cls, gamestate):
         moves = []
-        for card in gamestate.active_player[Zones.HAND]:
+        for card in gamestate.active_player.hand:
             moves.append(PlayCard(card))
             if card.card_type == CardTypes.SHIP:
                 abilities = card.abilities[Triggers.SHIP]
                 for ability in abilities:
                     if PendChoice in abilities:
                         if isinstance(ability, PendChoice):
-                            chosen_choice = type(choice(list(ability.choices.keys())))
+                            chosen_choice = type(gamestate.rng.choice(list(ability.choices.keys())))
                             moves.append(Choose(chosen_choice))
                     if PendScrap in abilities:
                         raise RuntimeError  # Scrap cards should be getting played individually
@@ -25,7 +25,7 @@ class Strategy(object):
 
     @classmethod
     def _get_play_scrap_ship_moves(cls, gamestate, card, effect):
-        cards_in_zones = sum([len(gamestate[z]) for z in effect.zones])
+        cards_in_zones = sum([len(gamestate.zone(z)) for z in effect.zones])
         # At least 1 card in trade row, or at least 2 cards across hand/discard,
         # because the card being played right now is also in hand and won't be a valid target!
         if Zones.TRADE_ROW in effect.zones and cards_in_zones or cards_in_zones > 1:
@@ -40,11 +40,11 @@ class Strategy(object):
     @classmethod
     def _get_card_to_scrap(cls, gamestate, scrap_effect):
         if Zones.TRADE_ROW in scrap_effect.zones:
-            return choice(gamestate[Zones.TRADE_ROW])
+            return gamestate.rng.choice(gamestate.trade_row)
 
         elif len(scrap_effect.zones) == 2:  # Hacky, but catches everything except blobs and machine base
             scout_to_scrap = None
-            for d_card in gamestate.active_player[Zones.DISCARD]:
+            for d_card in gamestate.active_player.discard:
                 if isinstance(d_card, Viper):
                     return d_card
                 elif not scout_to_scrap and isinstance(d_card, Scout):
@@ -53,7 +53,7 @@ class Strategy(object):
                 if scout_to_scrap:
                     return scout_to_scrap
                 else:
-                    for h_card in gamestate.active_player[Zones.HAND]:
+                    for h_card in gamestate.active_player.hand:
                         if isinstance(h_card, Viper):
                             return h_card
         else:
@@ -72,7 +72,7 @@ class Strategy(object):
     def _get_activate_base_move(cls, gamestate, card):
         for ability in card.abilities[Triggers.BASE]:
             if isinstance(ability, PendChoice):
-                chosen_choice = choice(list(ability.choices.keys()))
+                chosen_choice = gamestate.rng.choice(list(ability.choices.keys()))
                 if isinstance(ability, PendRecycle):
                     pass
                 else:
@@ -80,7 +80,7 @@ class Strategy(object):
             if isinstance(ability, PendScrap):
                 if not isinstance(card, MachineBase):  # Handled at top level bc the DRAW provides more info/options
                     # Only include a scrap move if there's anything available to scrap
-                    if any([gamestate[z] for z in ability.zones]):
+                    if any([gamestate.zone(z) for z in ability.zones]):
                         scrap_card = cls._get_card_to_scrap(gamestate, ability)
                         return [ActivateBase(card), Scrap(scrap_card) if scrap_card else Scrap()]
                     else:
@@ -93,60 +93,87 @@ class Strategy(object):
         for card in cards_by_cost:
             if faction is not None and faction != card.faction:
                 continue
-            if gamestate.active_player[ValueTypes.TRADE] >= card.cost:
+            if gamestate.active_player.trade >= card.cost:
                 return [AcquireCard(card)]
 
+    @classmethod
+    def _get_buy_explorer_move(cls, gamestate):
+        if gamestate.active_player.trade >= Explorer.cost:
+            return [AcquireCard()]
+
+    @classmethod
+    def _is_walled_off(cls, gamestate):
+        # Whether an opposing outpost is out of reach of this turn's damage
+        return any(base.defense > gamestate.active_player.damage for base in gamestate.opponent.bases.outposts)
+
     @classmethod
     def _get_attack_all_outposts_moves(cls, gamestate):
-        moves = []
-        for card in gamestate.opponent[Zones.IN_PLAY]:
-            if card.card_type == CardTypes.OUTPOST:
-                moves.append(AttackBase(card))
-        return moves
+        return [AttackBase(card) for card in gamestate.opponent.bases.outposts]
 
     @classmethod
     def _get_damage_required_to_win(cls, gamestate):
-        damage = gamestate.opponent[ValueTypes.AUTHORITY]
-        for card in gamestate.opponent[Zones.IN_PLAY]:
-            if card.card_type == CardTypes.OUTPOST:
-                damage += card.defense
-        return damage
+        return gamestate.opponent.authority + gamestate.opponent.bases.outpost_defense
 
     @classmethod
     def _get_total_available_scrap_damage(cls, gamestate):
-        total = 0
-        for card in gamestate.active_player[Zones.IN_PLAY]:
-            scrap_ability = card.abilities.get(Triggers.SCRAP, {})
-            if isinstance(scrap_ability, GainDamage):
-                total += scrap_ability.amount
-        return total
+        return sum(card.gain(Triggers.SCRAP, ValueTypes.DAMAGE) for card in gamestate.active_player.in_play)
 
     @classmethod
     def _get_scrap_all_cards_for_damage_moves(cls, gamestate):
-        scrap_moves = []
-        for card in gamestate.active_player[Zones.IN_PLAY]:
-            scrap_ability = card.abilities.get(Triggers.SCRAP, {})
-            if isinstance(scrap_ability, GainDamage):
-                scrap_moves.append(ActivateScrap(card))
-        return scrap_moves
+        return [ActivateScrap(card) for card in gamestate.active_player.in_play
+                if card.gain(Triggers.SCRAP, ValueTypes.DAMAGE)]
 
     @classmethod
     def _get_activate_all_ally_abilities(cls, gamestate):
         moves = []
         active_player = gamestate.active_player
-        for card in active_player[Zones.IN_PLAY]:
-            if Triggers.ALLY in card.available_abilities and active_player.active_factions[card.faction] > 1:
+        for card in active_player.in_play:
+            if card.can_trigger(Triggers.ALLY) and active_player.active_factions[card.faction] > 1:
                 moves.append(ActivateAlly(card))
         return moves
 
     @classmethod
     def _get_target_base(cls, gamestate):
-        bases = gamestate.opponent[Zones.IN_PLAY]
-        if bases:
-            outposts = [b for b in bases if b.card_type == CardTypes.OUTPOST]
-            if outposts:
-                return outposts[0]
-            return bases[0]
+        bases = gamestate.opponent.bases
+        if bases.outposts:
+            return bases.outposts[0]
+        if bases.bases:
+            return bases.bases[0]
         return None
 
+    @classmethod
+    def _get_resolve_pending_effect_moves(cls, gamestate):
+        # Fallback for pending effects a Strategy doesn't handle itself. An unresolved effect stays pending forever,
+        # and while it's there AcquireCard does nothing - which turns "buy the best card" into an infinite loop.
+        if not gamestate.pending_effects:
+            return None
+        effect = gamestate.pending_effects[0]
+        hand = gamestate.active_player.hand
+
+        if isinstance(effect, PendDiscard):
+            if effect.mandatory:
+                return [Discard(*hand[:effect.up_to])]
+            return [Discard()]
+
+        if isinstance(effect, PendScrap):
+            if effect.mandatory and hand:
+                return [Scrap(*hand[:effect.up_to])]
+            return [Scrap()]
+
+        if isinstance(effect, PendDestroyBase):
+            return [DestroyBase(cls._get_target_base(gamestate))]
+
+        if isinstance(effect, PendChoice):
+            return [Choose(gamestate.rng.choice(list(effect.choices.keys())))]
+
+        if isinstance(effect, PendCopyShip):
+            ships = [c for c in gamestate.active_player.in_play if c.is_ship() and not isinstance(c, StealthNeedle)]
+            return [CopyShip(max(ships, key=lambda c: c.cost))]
+
+        if isinstance(effect, PendAcquireShipToTopForFree):
+            ships = [c for c in gamestate.trade_row if c.is_ship()]
+            if ships:
+                return [AcquireShipToTopForFree(max(ships, key=lambda c: c.cost))]
+            return [AcquireShipToTopForFree()]
 
+        raise RuntimeError("No default resolution for {}".format(type(effect).__name__))
@@ -1,3 +1,6 @@
+from hashlib import sha256
+
+
 def move_list_contents(from_list, to_list):
     to_list.extend(from_list)
     from_list[:] = []
@@ -6,3 +9,23 @@ def move_list_contents(from_list, to_list):
 def move_list_item(item, from_list, to_list):
     from_list.remove(item)
     to_list.append(item)
+
+
+def derive_seed(seed, index):
+    # Hash-derived rather than seed + index, so neighbouring games (and neighbouring bulk runs) don't share streams
+    digest = sha256("{}:{}".format(seed, index).encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def derive_seeds(seed, n, start=0):
+    return [derive_seed(seed, index) for index in range(start, start + n)]
+
+
+def slot_items(obj):
+    # (name, value) for each attribute obj has set, as vars(obj).items() would give for a class without __slots__
+    items = dict(getattr(obj, "__dict__", {}))
+    for cls in type(obj).__mro__:
+        for name in vars(cls).get("__slots__", ()):
+            if name not in ("__dict__", "__weakref__") and hasattr(obj, name):
+                items[name] = getattr(obj, name)
+    return items.items()